@@ -0,0 +1,29 @@
+import contextlib
+import os
+import threading
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """Yield a temporary path to write, moved over path once the block succeeds
+
+    Readers see either the old file or the complete new one, never a half
+    written one. The temporary name is unique per process and thread, so
+    concurrent writers never share it; if the block fails, the temporary
+    file is removed and path is left as it was.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield temp_path
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+def write_atomic(path, text):
+    """Replace path with text in one step"""
+    with atomic_path(path) as temp_path:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
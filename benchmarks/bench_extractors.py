@@ -0,0 +1,167 @@
+"""Time every extractor on recorded pages and compare with a stored baseline
+
+Replays the fixtures in benchmarks/fixtures (see record_fixtures.py)
+through the same code the scrapers run, entirely offline, and reports
+pages per second and peak memory per page. Results are compared with
+benchmarks/baseline.json; a case that got slower than --tolerance allows
+is flagged and makes the run exit non-zero. Rates depend on the machine,
+so re-record the baseline with --save when moving to a new one.
+
+    python benchmarks/bench_extractors.py               # compare with the baseline
+    python benchmarks/bench_extractors.py --save        # record a new baseline
+    python benchmarks/bench_extractors.py cbsl          # only cases matching "cbsl"
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from cargills import product_row, products_from_payload  # noqa: E402
+from dom_extract import rows_to_items  # noqa: E402
+from economic import CBSLEconomicScraper  # noqa: E402
+from main import parse_ads  # noqa: E402
+from parsing import make_soup  # noqa: E402
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def cbsl_case(name, extract, items):
+    """Parse a CBSL page and run one extractor for every item, as a scrape does"""
+    markup = fixture(name)
+
+    def run():
+        scraper = CBSLEconomicScraper()
+        soup = make_soup(markup)
+        return [getattr(scraper, extract)(soup, item) for item in items]
+    return run
+
+
+def cargills_case():
+    payload = fixture('cargills_products.json')
+
+    def run():
+        return [product_row('Fruits', product) for product in products_from_payload(json.loads(payload))]
+    return run
+
+
+def foods_case():
+    """The foods.py row loop over the table extract_table returns for the fixture"""
+    table = BeautifulSoup(fixture('foods_table.html'), 'html.parser').find('table')
+    headers = [cell.get_text(strip=True) for cell in table.thead.find_all('th')]
+    rows = [[cell.get_text(strip=True) for cell in row.find_all('td')] for row in table.tbody.find_all('tr')]
+
+    def run():
+        return rows_to_items(headers, rows)
+    return run
+
+
+def ikman_case():
+    markup = fixture('ikman_listing.html')
+
+    def run():
+        return parse_ads(markup)
+    return run
+
+
+CASES = {
+    'ikman ad cards': ikman_case,
+    'cbsl exchange rates': lambda: cbsl_case('cbsl_exchange_rates.html', 'extract_rate_from_page',
+                                             CBSLEconomicScraper.CURRENCIES),
+    'cbsl inflation': lambda: cbsl_case('cbsl_inflation.html', 'extract_inflation_rate',
+                                        CBSLEconomicScraper.INFLATION_TYPES),
+    'cbsl interest rates': lambda: cbsl_case('cbsl_policy_rates.html', 'extract_interest_rate',
+                                             CBSLEconomicScraper.RATE_TYPES),
+    'cargills products': cargills_case,
+    'foods rows': foods_case,
+}
+
+
+def measure(run, min_time=1.0, rounds=5):
+    """Return (pages per second, peak bytes for one page, result)
+
+    The rate is the best of several rounds with the garbage collector
+    paused, as timeit does, which keeps scheduler and GC noise out of the
+    comparison with the baseline.
+    """
+    result = run()  # Warm caches the way a long crawl would
+    best = 0.0
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            repeat = 0
+            start = time.perf_counter()
+            while repeat < 3 or time.perf_counter() - start < min_time / rounds:
+                run()
+                repeat += 1
+            best = max(best, repeat / (time.perf_counter() - start))
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline extractor throughput benchmarks")
+    parser.add_argument('filter', nargs='?', default='', help="only run cases whose name contains this")
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against the baseline before a case is flagged (0.25 = 25%%)")
+    parser.add_argument('--min-time', type=float, default=1.0, help="seconds to run each case for")
+    args = parser.parse_args()
+
+    try:
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    regressions = []
+    print(f"{'case':<22} {'pages/s':>10} {'peak KiB':>9} {'baseline':>10} {'change':>8}")
+    for name, make_case in CASES.items():
+        if args.filter not in name:
+            continue
+        rate, peak, result = measure(make_case(), args.min_time)
+        if not result or (isinstance(result, list) and not any(result)):
+            print(f"Warning: {name} extracted nothing from its fixture")
+        results[name] = {'pages_per_sec': round(rate, 1), 'peak_kib': round(peak / 1024)}
+
+        line = f"{name:<22} {rate:>10.1f} {peak / 1024:>9.0f}"
+        if name in baseline:
+            change = rate / baseline[name]['pages_per_sec'] - 1
+            line += f" {baseline[name]['pages_per_sec']:>10.1f} {change:>+7.0%}"
+            if change < -args.tolerance:
+                line += "  SLOWER"
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        baseline.update(results)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline to {BASELINE_FILE}")
+    elif regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare per-label regex searches with the single-scan LabelMatcher
+
+Run from the repository root:
+
+    python benchmarks/bench_matcher.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_matcher import NUMBER, LabelMatcher  # noqa: E402
+
+WORDS = ['rate', 'bank', 'treasury', 'bill', 'index', 'reserve', 'deposit', 'lending', 'credit', 'money']
+
+
+def make_labels(count):
+    """Generate distinct indicator-like labels"""
+    rng = random.Random(count)
+    labels = set()
+    while len(labels) < count:
+        labels.add(' '.join(rng.choice(WORDS).title() for _ in range(3)) + f' {len(labels)}')
+    return sorted(labels)
+
+
+def make_text(labels, filler_words=40000):
+    """Build a page-sized text with every label followed by a number somewhere"""
+    rng = random.Random(0)
+    words = [rng.choice(WORDS) for _ in range(filler_words)]
+    for label in labels:
+        words.insert(rng.randrange(len(words)), f'{label}: {rng.randint(1, 999)}.{rng.randint(0, 99):02d}')
+    return ' '.join(words)
+
+
+def per_label(text, labels):
+    """The old approach: one f-string regex and one full-text search per label"""
+    found = {}
+    for label in labels:
+        match = re.search(rf'{label}[:\s]*(\d+\.\d+|\d+)', text, re.IGNORECASE)
+        if match:
+            found[label] = match.group(1)
+    return found
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    print(f"{'labels':>8} {'per-label (ms)':>16} {'single scan (ms)':>18} {'speedup':>9}")
+    for count in (5, 10, 25, 50, 100, 200):
+        labels = make_labels(count)
+        text = make_text(labels)
+
+        # re's internal cache hides compile cost, so purge it to match a cold run
+        re.purge()
+        old_time, old_found = best_of(lambda: per_label(text, labels))
+        matcher = LabelMatcher(labels, NUMBER)
+        new_time, new_found = best_of(lambda: matcher.scan(text))
+
+        assert old_found == new_found, "matchers disagree"
+        print(f"{count:>8} {old_time * 1000:>16.2f} {new_time * 1000:>18.2f} {old_time / new_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
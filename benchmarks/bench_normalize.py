@@ -0,0 +1,59 @@
+"""Compare the vectorized price normalization with a per-row apply
+
+Run from the repository root:
+
+    python benchmarks/bench_normalize.py [rows]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalize import normalize_prices, parse_price  # noqa: E402
+
+FORMS = ['Rs {:,} /month', 'Rs {:,}.00', 'Rs {:,} per day', 'Rs {:,}', 'LKR {:,}']
+
+
+def price_history(rows, distinct):
+    """Price strings drawn from a pool of distinct values, with some placeholders"""
+    rng = random.Random(0)
+    pool = [rng.choice(FORMS).format(rng.randrange(1000, 500000)) for _ in range(distinct)]
+    pool += ['Negotiable', 'N/A']
+    return pd.Series([rng.choice(pool) for _ in range(rows)])
+
+
+def per_row(prices):
+    """The baseline: one regex search per row through Series.apply"""
+    parsed = prices.apply(parse_price)
+    return pd.DataFrame(parsed.tolist(), columns=['Price_Amount', 'Price_Currency', 'Price_Period'], index=prices.index)
+
+
+def measure(function, prices, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(prices)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print(f"{rows} rows")
+    for distinct in (5000, rows):
+        prices = price_history(rows, distinct)
+        apply_time, expected = measure(per_row, prices, repeat=1)
+        vector_time, result = measure(normalize_prices, prices)
+        assert np.allclose(result['Price_Amount'], expected['Price_Amount'], equal_nan=True)
+        assert (result['Price_Period'].astype(object).fillna('') == expected['Price_Period'].fillna('')).all()
+        print(f"  {distinct:>8} distinct  apply {apply_time:6.2f}s  vectorized {vector_time:6.2f}s  "
+              f"{apply_time / vector_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare parse time and peak memory per page across parser backends
+
+Each available backend is timed on a full-tree parse and on the strained
+parse the scrapers use. Pass HTML files to benchmark saved pages; without
+arguments a synthetic ikman results page and CBSL rates page are used.
+
+    python benchmarks/bench_parsers.py [page.html ...]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsing import IKMAN_AD_CARDS, PARSER_MODULES, make_soup, parser_available  # noqa: E402
+
+NOISE = (
+    '<script>window.__data = {"ads": [' + ','.join('{"id": %d}' % i for i in range(400)) + ']};</script>'
+    '<style>' + ''.join('.c%d{margin:%dpx}' % (i, i) for i in range(300)) + '</style>'
+    '<nav><ul>' + ''.join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(80)) + '</ul></nav>'
+)
+
+
+def ikman_page(cards=25):
+    """A results page shaped like ikman.lk's, with scripts, navigation and ad cards"""
+    card = (
+        '<li class="normal--2QYVk gtm-normal-ad"><a href="/en/ad/{i}">'
+        '<img alt="Boarding room {i} for rent" src="/img/{i}.jpg">'
+        '<h2 class="heading--2eONR">Boarding room {i} for rent</h2>'
+        '<div class="details--1GUIn">Colombo, Rooms</div>'
+        '<div class="description--2-ez3">Room with attached bathroom near campus</div>'
+        '<div class="price--3SnqI color--t0tGX"><span>Rs 25,{i:03d} /month</span></div>'
+        '</a></li>'
+    )
+    ads = ''.join(card.format(i=i) for i in range(cards))
+    return f'<html><head>{NOISE}</head><body>{NOISE}<ul class="list--3NxGO">{ads}</ul>{NOISE}</body></html>'
+
+
+def cbsl_page(rows=40):
+    """A rates page shaped like cbsl.gov.lk's, with navigation and a rates table"""
+    body = ''.join(f'<tr><td>Currency {i} (C{i:02d})</td><td>{100 + i}.2500</td><td>{101 + i}.7500</td></tr>' for i in range(rows))
+    return (
+        f'<html><head>{NOISE}</head><body>{NOISE}<div class="content"><h1>Daily Indicative Exchange Rates</h1>'
+        f'<p>Rates published 2026-10-18. USD: 299.50</p><table>{body}</table></div>{NOISE}</body></html>'
+    )
+
+
+def measure(markup, parser, parse_only, repeat=20):
+    """Return (seconds per page, peak bytes) for one parser configuration"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        make_soup(markup, parse_only=parse_only, parser=parser)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    soup = make_soup(markup, parse_only=parse_only, parser=parser)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del soup
+    return elapsed, peak
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                strainer = None if 'cbsl' in os.path.basename(path).lower() else IKMAN_AD_CARDS
+                pages.append((os.path.basename(path), f.read(), strainer))
+    else:
+        pages = [('ikman results', ikman_page(), IKMAN_AD_CARDS), ('cbsl rates', cbsl_page(), None)]
+
+    parsers = [parser for parser in PARSER_MODULES if parser_available(parser)]
+    print(f"{'page':<16} {'parser':<12} {'mode':<9} {'ms/page':>9} {'peak KiB':>10}")
+    for name, markup, strainer in pages:
+        for parser in parsers:
+            for mode, parse_only in (('full', None), ('strained', strainer)):
+                if mode == 'strained' and (parse_only is None or parser == 'html5lib'):
+                    continue  # CBSL pages are always parsed in full; html5lib cannot strain
+                elapsed, peak = measure(markup, parser, parse_only)
+                print(f"{name:<16} {parser:<12} {mode:<9} {elapsed * 1000:>9.2f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Write the HTML/JSON fixtures that bench_extractors.py replays
+
+By default the fixtures are regenerated as synthetic stand-ins shaped like
+each site's markup, so the suite runs anywhere. With --live, the pages
+that can be fetched without a browser are recorded from the real sites
+instead (the foods table is rendered by JavaScript; save it from a browser
+as benchmarks/fixtures/foods_table.html).
+
+    python benchmarks/record_fixtures.py [--live]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bench_parsers import NOISE, cbsl_page, ikman_page  # noqa: E402
+
+CBSL = "https://www.cbsl.gov.lk"
+LIVE_PAGES = {
+    'ikman_listing.html': "https://ikman.lk/en/ads/sri-lanka/property?sort=relevance&buy_now=0&urgent=0&query=boarding&page=1",
+    'cbsl_exchange_rates.html': f"{CBSL}/rates-and-indicators/exchange-rates/daily-indicative-exchange-rates",
+    'cbsl_inflation.html': f"{CBSL}/measures-of-consumer-price-inflation",
+    'cbsl_policy_rates.html': f"{CBSL}/rates-and-indicators/policy-rates",
+}
+CARGILLS_CATEGORY = "https://cargillsonline.com/Product/Fruits?IC=OQ==&NC=RnJ1aXRz"
+
+
+def cbsl_rates_page():
+    """Exchange rates table with every currency the scraper looks for"""
+    currencies = ('USD', 'GBP', 'EUR', 'INR', 'JPY', 'AUD', 'CAD', 'CHF')
+    page = cbsl_page()
+    rows = ''.join(f'<tr><td>{code}</td><td>{150 + i * 37}.{i:02d}25</td><td>{152 + i * 37}.7500</td></tr>'
+                   for i, code in enumerate(currencies))
+    return page.replace('<table>', f'<table><tr><th>Currency</th><th>Buy</th><th>Sell</th></tr>{rows}', 1)
+
+
+def cbsl_inflation_page():
+    """Inflation page: narrative paragraphs and a monthly CCPI/NCPI table"""
+    rng = random.Random(1)
+    paragraphs = ''.join(
+        f'<p>Headline inflation, as measured by the year-on-year change in the index, was '
+        f'{rng.uniform(0, 6):.1f} per cent in month {i}. Food inflation moved to {rng.uniform(-2, 8):.1f} per cent.</p>'
+        for i in range(30)
+    )
+    months = ''.join(
+        f'<tr><td>2026-{m:02d}</td><td>CCPI</td><td>{rng.uniform(0, 6):.1f}</td>'
+        f'<td>NCPI</td><td>{rng.uniform(0, 6):.1f}</td><td>Core CCPI</td><td>{rng.uniform(0, 6):.1f}</td></tr>'
+        for m in range(1, 13)
+    )
+    return (
+        f'<html><head>{NOISE}</head><body>{NOISE}<div class="content"><h1>Measures of Consumer Price Inflation</h1>'
+        f'<p>CCPI: 1.5% (year-on-year). NCPI 2.1%. Core CCPI: 2.4%.</p>{paragraphs}'
+        f'<table>{months}</table></div>{NOISE}</body></html>'
+    )
+
+
+def cbsl_policy_page():
+    """Policy rates table plus historical rate changes"""
+    rates = (('Standing Deposit Facility Rate', '7.25'), ('Standing Lending Facility Rate', '8.25'),
+             ('Bank Rate', '11.25'), ('Overnight Policy Rate', '7.75'), ('Statutory Reserve Ratio', '2.00'))
+    current = ''.join(f'<tr><td>{name}</td><td>{value}</td><td>2026-07-23</td></tr>' for name, value in rates)
+    rng = random.Random(2)
+    history = ''.join(
+        f'<tr><td>20{y:02d}-0{q}-15</td><td>{rng.uniform(4, 15):.2f}</td><td>{rng.uniform(5, 16):.2f}</td></tr>'
+        for y in range(5, 26) for q in range(1, 5)
+    )
+    return (
+        f'<html><head>{NOISE}</head><body>{NOISE}<div class="content"><h1>Policy Rates</h1>'
+        f'<p>Repo Rate 7.50 and Reverse Repo Rate 8.50 under the standing facilities.</p>'
+        f'<table><tr><th>Rate</th><th>Per cent</th><th>Effective</th></tr>{current}</table>'
+        f'<table><tr><th>Date</th><th>SDFR</th><th>SLFR</th></tr>{history}</table></div>{NOISE}</body></html>'
+    )
+
+
+def cargills_payload(products=48):
+    """Listing endpoint response for one full page of a category"""
+    rng = random.Random(3)
+    return json.dumps({'Data': {'Products': [
+        {'ItemName': f'Fresh Produce Item {i} {rng.choice(["500g", "1kg", "Each"])}',
+         'Price': round(rng.uniform(80, 2500), 2),
+         'ItemImage': f'https://cargillsonline.com/VendorItems/MaxImages/{i}.jpg',
+         'SKUCode': f'{100000 + i}', 'Brand': rng.choice(['Cargills', 'Local', 'Imported']), 'InStock': True}
+        for i in range(products)
+    ]}})
+
+
+def foods_table_page(rows=100):
+    """Food composition results table as rendered in the browser"""
+    rng = random.Random(4)
+    headers = ['Code', 'Food name', 'Energy (kcal)', 'Water (g)', 'Protein (g)', 'Fat (g)', 'Carbohydrate (g)',
+               'Fibre (g)', 'Calcium (mg)', 'Iron (mg)', 'Sodium (mg)', 'Vitamin C (mg)']
+    head = ''.join(f'<th>{name}</th>' for name in headers)
+    body = ''.join(
+        '<tr>' + f'<td>LK{i:04d}</td><td>Food item {i}</td>'
+        + ''.join(f'<td>{rng.uniform(0, 400):.1f}</td>' for _ in headers[2:]) + '</tr>'
+        for i in range(rows)
+    )
+    return (f'<html><head>{NOISE}</head><body><table class="table"><thead><tr>{head}</tr></thead>'
+            f'<tbody>{body}</tbody></table></body></html>')
+
+
+SYNTHETIC = {
+    'ikman_listing.html': ikman_page,
+    'cbsl_exchange_rates.html': cbsl_rates_page,
+    'cbsl_inflation.html': cbsl_inflation_page,
+    'cbsl_policy_rates.html': cbsl_policy_page,
+    'cargills_products.json': cargills_payload,
+    'foods_table.html': foods_table_page,
+}
+
+
+def record_live(name):
+    from http_client import default_client
+    from cargills import API_URL, PAGE_SIZE, category_id
+
+    http = default_client()
+    if name == 'cargills_products.json':
+        response = http.request('POST', API_URL, json={
+            'CategoryId': category_id(CARGILLS_CATEGORY), 'PageIndex': 1, 'PageSize': PAGE_SIZE, 'SearchText': '',
+        })
+    else:
+        response = http.get(LIVE_PAGES[name])
+    response.raise_for_status()
+    return response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the benchmark fixtures")
+    parser.add_argument('--live', action='store_true', help="record from the live sites where possible")
+    args = parser.parse_args()
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, generate in SYNTHETIC.items():
+        if args.live and name != 'foods_table.html':
+            content, origin = record_live(name), 'recorded'
+        else:
+            content, origin = generate(), 'synthetic'
+        with open(os.path.join(FIXTURE_DIR, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        print(f"{name}: {len(content) / 1024:.0f} KiB ({origin})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+
+import metrics
+from atomic import write_atomic
+from http_client import default_client
+from waits import network_idle, wait_for
+
+# Where the resolved chromedriver path is remembered between runs
+CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'scrapers'))
+# Control URL of a running browser_service.py; when set, sessions attach to its warm Chrome
+SERVICE_URL = os.environ.get('SCRAPER_BROWSER_SERVICE')
+RECYCLE_AFTER = 200  # Pages per Chrome process before it is restarted to cap memory growth
+LEASE_TIMEOUT = 600  # Seconds to wait for a free Chrome when every service slot is leased
+# The scrapers wait for the content they read, so navigation returns at DOMContentLoaded
+PAGE_LOAD_STRATEGY = os.environ.get('SCRAPER_PAGE_LOAD', 'eager')
+
+# URL patterns (Network.setBlockedURLs wildcards) the lean profile never fetches, by category.
+# The scrapers read DOM text and src/ng-src strings, which blocked requests leave intact.
+BLOCK_PATTERNS = {
+    'images': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*'],
+    'fonts': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*', '*fonts.googleapis.com*', '*fonts.gstatic.com*'],
+    'trackers': ['*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+                 '*googleadservices.com*', '*adservice.google.*', '*connect.facebook.net*', '*facebook.com/tr*',
+                 '*hotjar.com*', '*clarity.ms*', '*scorecardresearch.com*'],
+    'stylesheets': ['*.css*'],  # Not blocked by default: innerText depends on CSS visibility
+}
+DEFAULT_BLOCK = ('images', 'media', 'fonts', 'trackers')
+# Comma-separated categories and/or extra URL patterns replacing DEFAULT_BLOCK; "none" loads pages in full
+BLOCK = os.environ.get('SCRAPER_BLOCK')
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def chrome_version():
+    """Major version of the installed Chrome, or None if it cannot be read"""
+    try:
+        version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception:
+        return None
+    return version.split('.')[0] if version else None
+
+
+def chromedriver_path(refresh=False):
+    """Return a chromedriver binary, resolving it over the network only when the cache is stale
+
+    ChromeDriverManager looks up the latest driver version online on every
+    call; the path it returns is cached on disk together with the Chrome
+    major version it was resolved for, and reused while that file exists
+    and Chrome has not been updated since. refresh resolves it again.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path) and not refresh:
+            return _driver_path
+
+        cache_file = os.path.join(CACHE_DIR, 'chromedriver.json')
+        chrome = chrome_version()
+        if not refresh:
+            try:
+                with open(cache_file) as f:
+                    cached = json.load(f)
+                if os.access(cached['path'], os.X_OK) and cached.get('chrome') == chrome:
+                    _driver_path = cached['path']
+                    return _driver_path
+            except (OSError, ValueError, KeyError):
+                pass
+
+        path = ChromeDriverManager().install()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        write_atomic(cache_file, json.dumps({'path': path, 'chrome': chrome}))
+        _driver_path = path
+        return path
+
+
+def block_patterns(block=None):
+    """URL patterns for a block list of BLOCK_PATTERNS categories and/or raw patterns"""
+    if block is None:
+        block = BLOCK.split(',') if BLOCK else DEFAULT_BLOCK
+    patterns = []
+    for entry in block:
+        entry = entry.strip()
+        if entry and entry != 'none':
+            patterns += BLOCK_PATTERNS.get(entry, [entry])
+    return patterns
+
+
+def use_service(service_url):
+    """Point every Browser started from now on at a browser service (None for local Chrome)"""
+    global SERVICE_URL
+    SERVICE_URL = service_url
+
+
+def lease_browser(service_url, timeout=LEASE_TIMEOUT):
+    """Lease a warm Chrome from the service, waiting while all of them are busy"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return service_call(service_url, 'acquire')
+        except urllib.error.HTTPError as e:
+            # 503 means every slot is leased to another session
+            if e.code != 503 or time.monotonic() > deadline:
+                raise
+        time.sleep(0.5)
+
+
+def service_call(service_url, action, payload=None):
+    """POST a JSON request to the browser service and return its JSON reply"""
+    request = urllib.request.Request(
+        f"{service_url.rstrip('/')}/{action}",
+        data=json.dumps(payload or {}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)
+
+
+def page_load_retryable(error):
+    """Page load timeouts and Chrome's network errors (net::ERR_...) are worth another try"""
+    return isinstance(error, TimeoutException) or (
+        isinstance(error, WebDriverException) and 'net::ERR_' in (error.msg or ''))
+
+
+class Browser:
+    """A Chrome WebDriver session that can stand in for a plain driver
+
+    With a browser service configured, the session attaches to one of the
+    service's already-running Chrome processes over its remote-debugging
+    port; otherwise Chrome is launched locally. Page loads through get() are
+    counted and the Chrome process is recycled every recycle_after pages.
+    Sessions are lean by default: the block list (see block_patterns) is
+    cut off through DevTools and navigation returns at DOMContentLoaded;
+    pass block=[] and page_load_strategy='normal' for full page loads.
+    Every other attribute is delegated to the underlying WebDriver.
+    """
+
+    def __init__(self, extra_args=(), service_url=None, recycle_after=RECYCLE_AFTER, block=None,
+                 page_load_strategy=None):
+        self.extra_args = list(extra_args)
+        self.service_url = service_url or SERVICE_URL
+        self.recycle_after = recycle_after
+        self.blocked = block_patterns(block)
+        self.page_load_strategy = page_load_strategy or PAGE_LOAD_STRATEGY
+        self.traffic = {'bytes': 0, 'blocked': 0}
+        self.driver = None
+        self.slot = None
+        self.pages = 0
+
+    def start(self):
+        options = webdriver.ChromeOptions()
+        if self.service_url:
+            lease = lease_browser(self.service_url)
+            self.slot = lease['slot']
+            options.debugger_address = lease['debugger_address']
+            print(f"Attached to warm Chrome at {lease['debugger_address']}")
+        else:
+            options.add_argument('--headless')
+            for arg in self.extra_args:
+                options.add_argument(arg)
+        options.page_load_strategy = self.page_load_strategy
+        # Network events, for the bytes received and requests blocked
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        try:
+            self.driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+        except SessionNotCreatedException as e:
+            # Chrome updated under a cached driver it could not detect; resolve a matching one and retry once
+            print(f"Chrome session failed with the cached chromedriver, resolving it again: {e.msg}")
+            self.driver = webdriver.Chrome(service=Service(chromedriver_path(refresh=True)), options=options)
+        if self.blocked:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked})
+        self.pages = 0
+        return self
+
+    def record_traffic(self):
+        """Add the bytes received and requests blocked since the last call to the run's counters"""
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException:
+            return
+        received = blocked = 0
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            if message['method'] == 'Network.loadingFinished':
+                received += message['params'].get('encodedDataLength', 0)
+            elif message['method'] == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+                blocked += 1
+        self.traffic['bytes'] += int(received)
+        self.traffic['blocked'] += blocked
+        metrics.count('browser_bytes', int(received))
+        metrics.count('requests_blocked', blocked)
+
+    def quit(self, recycle=False):
+        if self.driver is None:
+            return
+        try:
+            self.record_traffic()
+            self.driver.quit()
+        finally:
+            self.driver = None
+            if self.slot is not None:
+                # Hand Chrome back to the service, which recycles it once it has served enough pages
+                service_call(self.service_url, 'release', {'slot': self.slot, 'pages': self.pages, 'recycle': recycle})
+                self.slot = None
+
+    def recycle(self):
+        """Replace the Chrome process behind this session"""
+        print(f"Recycling Chrome after {self.pages} pages")
+        self.quit(recycle=True)
+        self.start()
+
+    def get(self, url):
+        """Load url under the same retry policy and adaptive throttle as the HTTP client"""
+        if self.pages >= self.recycle_after:
+            self.recycle()
+        host = urlsplit(url).hostname or ''
+        return default_client().retry.call(host, lambda: self.load(host, url), retryable=page_load_retryable)
+
+    def load(self, host, url):
+        """Make one attempt at loading url"""
+        self.pages += 1
+        throttle = default_client().throttle_for(host)
+        waited = throttle.acquire()
+        if waited:
+            metrics.observe('throttle', waited)
+        start = time.monotonic()
+        try:
+            with metrics.timed('fetch'):
+                result = self.driver.get(url)
+        except TimeoutException:
+            throttle.record(kind='browser', timed_out=True)
+            raise
+        throttle.record(time.monotonic() - start, kind='browser')
+        # Drain the log every page so it never piles up; requests that finish later count with the next page
+        self.record_traffic()
+        return result
+
+    def __getattr__(self, name):
+        driver = self.__dict__.get('driver')
+        if driver is None:
+            raise AttributeError(name)
+        return getattr(driver, name)
+
+    def __enter__(self):
+        return self.start() if self.driver is None else self
+
+    def __exit__(self, *exc_info):
+        self.quit()
+
+
+def new_browser(extra_args=()):
+    """Start a Browser session, warm from the service when one is configured"""
+    return Browser(extra_args).start()
+
+
+def measure_load(session, url, settle=1.0):
+    """(seconds until get() returned, bytes received once the page settled, requests blocked) for one load"""
+    session.record_traffic()
+    before = dict(session.traffic)
+    start = time.monotonic()
+    session.get(url)
+    elapsed = time.monotonic() - start
+    wait_for(session, network_idle(settle), 30, "page to settle")
+    session.record_traffic()
+    return elapsed, session.traffic['bytes'] - before['bytes'], session.traffic['blocked'] - before['blocked']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and lean page loads of the scraped sites")
+    parser.add_argument('urls', nargs='+', help="pages to load, e.g. a listing page of each site")
+    parser.add_argument('--block', help="comma-separated categories and/or URL patterns (default: SCRAPER_BLOCK or "
+                                        f"{','.join(DEFAULT_BLOCK)}; categories: {', '.join(BLOCK_PATTERNS)})")
+    args = parser.parse_args()
+
+    block = args.block.split(',') if args.block else None
+    with Browser(block=[], page_load_strategy='normal') as full, Browser(block=block) as lean:
+        print(f"{'page':<50} {'full KiB':>9} {'lean KiB':>9} {'saved':>6} {'blocked':>8} {'full s':>7} {'lean s':>7}")
+        for url in args.urls:
+            full_time, full_bytes, _ = measure_load(full, url)
+            lean_time, lean_bytes, blocked = measure_load(lean, url)
+            saved = 1 - lean_bytes / full_bytes if full_bytes else 0.0
+            print(f"{url[:50]:<50} {full_bytes / 1024:>9.0f} {lean_bytes / 1024:>9.0f} {saved:>6.0%} {blocked:>8} "
+                  f"{full_time:>7.2f} {lean_time:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Long-lived pool of warm headless Chrome processes for the Selenium scrapers
+
+Start it once on the crawl box:
+
+    python browser_service.py --size 4
+
+and point the scrapers at it:
+
+    export SCRAPER_BROWSER_SERVICE=http://127.0.0.1:9230
+
+Each scraper session leases one Chrome over the control API and attaches to
+it through its remote-debugging port, so runs skip chromedriver resolution
+and browser cold start. Chrome processes are health-checked in the
+background, restarted when they die, and recycled after serving
+--recycle-after pages to cap memory growth.
+
+Control API (JSON over HTTP):
+    GET  /health   slot states
+    POST /acquire  lease a free slot -> {"slot", "debugger_address"}
+    POST /release  {"slot", "pages", "recycle"} return a slot
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+CHROME_FLAGS = [
+    '--headless=new',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--window-size=1920,1080',
+]
+
+
+def find_chrome():
+    """Locate the Chrome binary from CHROME_BINARY or the PATH"""
+    binary = os.environ.get('CHROME_BINARY')
+    if binary:
+        return binary
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise RuntimeError("Chrome not found; set CHROME_BINARY")
+
+
+def chrome_healthy(port):
+    """Return True if Chrome answers on its remote-debugging port"""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=2) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+class ChromeSlot:
+    """One Chrome process with its own debugging port and profile"""
+
+    def __init__(self, index, port, chrome, profile_root, extra_flags):
+        self.index = index
+        self.port = port
+        self.chrome = chrome
+        self.profile = os.path.join(profile_root, f"slot-{index}")
+        self.extra_flags = extra_flags
+        self.process = None
+        self.in_use = False
+        self.pages = 0
+        self.restarts = 0
+
+    def start(self, timeout=20):
+        self.process = subprocess.Popen(
+            [self.chrome, f'--remote-debugging-port={self.port}', f'--user-data-dir={self.profile}']
+            + CHROME_FLAGS + self.extra_flags,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if chrome_healthy(self.port):
+                self.pages = 0
+                return
+            time.sleep(0.1)
+        raise RuntimeError(f"Chrome on port {self.port} did not come up")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    def restart(self, reason):
+        print(f"Restarting Chrome slot {self.index} ({reason})")
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def status(self):
+        return {
+            'slot': self.index,
+            'port': self.port,
+            'in_use': self.in_use,
+            'pages': self.pages,
+            'restarts': self.restarts,
+            'alive': self.process is not None and self.process.poll() is None,
+        }
+
+
+class BrowserService:
+    """Pool of warm Chrome slots with leasing, health checks and recycling"""
+
+    def __init__(self, size, base_port, recycle_after, extra_flags=(), health_interval=10):
+        self.recycle_after = recycle_after
+        self.health_interval = health_interval
+        self.lock = threading.Lock()
+        self.profile_root = tempfile.mkdtemp(prefix='scraper-chrome-')
+        chrome = find_chrome()
+        self.slots = [ChromeSlot(i, base_port + i, chrome, self.profile_root, list(extra_flags)) for i in range(size)]
+
+    def start(self):
+        for slot in self.slots:
+            slot.start()
+        threading.Thread(target=self.health_loop, daemon=True).start()
+
+    def stop(self):
+        for slot in self.slots:
+            slot.stop()
+        shutil.rmtree(self.profile_root, ignore_errors=True)
+
+    def acquire(self):
+        with self.lock:
+            for slot in self.slots:
+                if not slot.in_use:
+                    slot.in_use = True
+                    break
+            else:
+                return None
+        # Never hand out a dead browser
+        if not chrome_healthy(slot.port):
+            slot.restart("unhealthy on acquire")
+        return {'slot': slot.index, 'debugger_address': f"127.0.0.1:{slot.port}"}
+
+    def release(self, index, pages=0, recycle=False):
+        slot = self.slots[index]
+        slot.pages += pages
+        if recycle or slot.pages >= self.recycle_after:
+            slot.restart(f"recycle after {slot.pages} pages")
+        with self.lock:
+            slot.in_use = False
+
+    def health_loop(self):
+        while True:
+            time.sleep(self.health_interval)
+            for slot in self.slots:
+                with self.lock:
+                    if slot.in_use:
+                        continue
+                    slot.in_use = True  # Keep it from being leased mid-check
+                try:
+                    if not chrome_healthy(slot.port):
+                        slot.restart("failed health check")
+                except Exception as e:
+                    print(f"Health check for slot {slot.index} failed: {e}")
+                finally:
+                    with self.lock:
+                        slot.in_use = False
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self.reply(200, {'slots': [slot.status() for slot in service.slots]})
+            else:
+                self.reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            try:
+                if self.path == '/acquire':
+                    lease = service.acquire()
+                    if lease is None:
+                        self.reply(503, {'error': 'no free browser'})
+                    else:
+                        self.reply(200, lease)
+                elif self.path == '/release':
+                    service.release(payload['slot'], payload.get('pages', 0), payload.get('recycle', False))
+                    self.reply(200, {'ok': True})
+                else:
+                    self.reply(404, {'error': 'not found'})
+            except Exception as e:
+                self.reply(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a pool of warm headless Chrome processes")
+    parser.add_argument('--size', type=int, default=4, help="Chrome processes to keep warm")
+    parser.add_argument('--base-port', type=int, default=9222, help="first remote-debugging port")
+    parser.add_argument('--control-port', type=int, default=9230)
+    parser.add_argument('--recycle-after', type=int, default=500, help="pages per Chrome before a restart")
+    parser.add_argument('--chrome-flag', action='append', default=[], help="extra Chrome flag (repeatable)")
+    args = parser.parse_args()
+
+    service = BrowserService(args.size, args.base_port, args.recycle_after, args.chrome_flag)
+    service.start()
+    server = ThreadingHTTPServer(('127.0.0.1', args.control_port), make_handler(service))
+    print(f"Browser service with {args.size} Chrome processes on http://127.0.0.1:{args.control_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import argparse
+import base64
+from urllib.parse import parse_qs, urlsplit
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+import metrics
+from browser import new_browser
+from extract_spec import CardSpec
+from checkpoint import finish_run, open_checkpointed_sink
+from http_client import default_client
+from sinks import FORMATS, source_name
+from waits import any_of, content_fingerprint, elements_present, fingerprint_changed, print_wait_summary, wait_for
+
+# Listing endpoint behind the AngularJS product grid ("product in Products").
+# The grid posts the category id from the page's IC parameter and pages by index.
+API_URL = "https://cargillsonline.com/Web/GetMenuCategoryItemsPagingV3/"
+PAGE_SIZE = 48
+MAX_PAGES = 200
+
+# Grid cards rendered by the AngularJS templates, in the order the scraper tries them
+GRID_XPATHS = [
+    "//div[@ng-repeat='product in Products']",
+    "//div[@ng-repeat='collection in DS.Data']",
+    "//div[@ng-repeat='ban in DS.Data']",
+]
+GRID_CSS = ", ".join(f"div[ng-repeat='{repeat}']" for repeat in ('product in Products', 'collection in DS.Data', 'ban in DS.Data'))
+
+# Card fields read in the browser: name from the first <p>, price from the
+# txtSmall heading and the image from ng-src, falling back to src
+CARD_SPEC = CardSpec([(By.XPATH, xpath) for xpath in GRID_XPATHS], {
+    'Name': {'selectors': ['p']},
+    'Price': {'selectors': ["h4[class*='txtSmall']"]},
+    'Image_URL': {'selectors': ['img'], 'attrs': ['ng-src', 'src']},
+})
+
+# Product JSON fields for each output column, first one present wins
+PRODUCT_FIELDS = {
+    'Name': ('ItemName', 'SKUName', 'Name'),
+    'Price': ('Price', 'SellingPrice', 'UnitPrice'),
+    'Image_URL': ('ItemImage', 'ImageURL', 'Image'),
+}
+
+
+def category_name(url):
+    """Return the category slug from a Cargills product URL"""
+    return url.split('Product/')[1].split('?')[0]
+
+
+def category_id(url):
+    """Decode the base64 IC parameter of a Cargills product URL"""
+    value = parse_qs(urlsplit(url).query)['IC'][0]
+    return base64.b64decode(value).decode('utf-8')
+
+
+def products_from_payload(payload):
+    """Return the product list from a listing response"""
+    if isinstance(payload, list):
+        return payload
+    for key in ('Products', 'Data', 'Items', 'd'):
+        value = payload.get(key)
+        if isinstance(value, list):
+            return value
+        if isinstance(value, dict):
+            return products_from_payload(value)
+    return []
+
+
+def product_row(category, product):
+    """Map one product record onto the columns the browser scraper writes"""
+    row = {'Category': category}
+    for column, keys in PRODUCT_FIELDS.items():
+        row[column] = next((product[key] for key in keys if product.get(key) not in (None, '')), "N/A")
+
+    # The grid shows prices as "Rs 1,250.00"; keep the CSV identical
+    if isinstance(row['Price'], (int, float)):
+        row['Price'] = f"Rs {row['Price']:,.2f}"
+    return row
+
+
+def scrape_category_http(base_url, on_page, http=None, api_url=API_URL, page_size=PAGE_SIZE, max_pages=MAX_PAGES,
+                         start_page=1):
+    """Read a category straight from the listing endpoint, paging by parameter
+
+    on_page(page, rows) is called for every page. Failed requests raise.
+    Returns True once the category was read to its last page, or False if
+    the first page held no products: an empty category looks the same as a
+    response in a shape products_from_payload does not know, so the caller
+    decides whether to try the browser.
+    """
+    http = http or default_client()
+    category = category_name(base_url)
+
+    for page in range(start_page, max_pages + 1):
+        print(f"Fetching page {page} of {category}")
+        response = http.request('POST', api_url, json={
+            'CategoryId': category_id(base_url),
+            'PageIndex': page,
+            'PageSize': page_size,
+            'SearchText': '',
+        })
+        response.raise_for_status()
+        with metrics.timed('parse'):
+            products = products_from_payload(response.json())
+
+        if not products:
+            if page == start_page == 1:
+                print(f"No products in the listing response for {category}")
+                return False
+            break
+        with metrics.timed('extract'):
+            rows = [product_row(category, product) for product in products]
+        if page == 1 and not any(row[column] != "N/A" for row in rows for column in PRODUCT_FIELDS):
+            raise ValueError(f"Products have none of the fields {', '.join(PRODUCT_FIELDS)} expects")
+        on_page(page, rows)
+
+        # A short page is the last one
+        if len(products) < page_size:
+            break
+
+    return True
+
+
+def scrape_category_browser(driver, base_url, on_page, start_page=1):
+    """Read a category by rendering the grid and clicking through its pages
+
+    on_page(page, rows) is called for every page from start_page on; the
+    pages before it are only clicked through. Returns False if paging
+    failed before the last page.
+    """
+    driver.get(base_url)
+    wait_for(driver, any_of(*(elements_present((By.XPATH, xpath)) for xpath in GRID_XPATHS)), 15, "product grid")
+    category = category_name(base_url)
+    page = 1
+    total_pages = 1  # Will be updated after first page
+
+    while page <= total_pages:
+        if page >= start_page:
+            print(f"Scraping page {page} of {category}")
+
+            # Read every card (products, then collections, then banners) in one script call
+            cards = CARD_SPEC.extract_page(driver)
+
+            if not cards:
+                print(f"No products found on page {page}, stopping.")
+                break
+
+            rows = []
+            for card in cards:
+                missing = [field for field, value in card.items() if value is None]
+                if missing:
+                    print(f"Error extracting data: no {', '.join(missing)} in card")
+                    continue
+
+                rows.append({'Category': category, **card})
+            on_page(page, rows)
+
+        # On first page, find total pages
+        if page == 1:
+            total_pages = 1
+            try:
+                # Look for numbered links
+                number_links = driver.find_elements(By.XPATH, "//a[string(number(text())) = text()]")
+                for link in number_links:
+                    try:
+                        num = int(link.text.strip())
+                        if num > total_pages:
+                            total_pages = num
+                    except:
+                        continue
+                print(f"Total pages detected: {total_pages}")
+            except Exception as e:
+                print(f"Error finding total pages: {e}")
+
+        # If not the last page, try to go to next page
+        if page < total_pages:
+            try:
+                # Wait for next button to be clickable
+                WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//a[string(number(text())) = text() and text()='" + str(page + 1) + "']")))
+                next_button = driver.find_element(By.XPATH, "//a[string(number(text())) = text() and text()='" + str(page + 1) + "']")
+
+                # Scroll to the element
+                driver.execute_script("arguments[0].scrollIntoView();", next_button)
+
+                # Try JavaScript click, then wait for the grid to re-render with new items
+                fingerprint = content_fingerprint(driver, GRID_CSS)
+                driver.execute_script("arguments[0].click();", next_button)
+                wait_for(driver, fingerprint_changed(GRID_CSS, fingerprint), 15, "next page")
+                page += 1
+            except Exception as e:
+                print(f"Error clicking next page {page + 1}: {e}")
+                return False
+        else:
+            break
+
+    return True
+
+
+def scrape_categories(urls, on_page, mode='auto', api_url=API_URL, chrome_args=(), checkpoint=None):
+    """Scrape every category, over HTTP where possible and in Chrome otherwise
+
+    on_page(key, page, rows) is called for every page of every category,
+    where key is the category URL, suffixed with '#browser' for pages read
+    in Chrome (the two paths number their pages differently). With a
+    checkpoint, finished categories are skipped and the others continue
+    after their last recorded page. Returns True if every category was read
+    to its end.
+    """
+    driver = None
+    complete = True
+
+    try:
+        for base_url in urls:
+            if checkpoint and base_url in checkpoint.finished:
+                continue
+            browser_key = base_url + '#browser'
+            http_start = checkpoint.last_page(base_url) + 1 if checkpoint else 1
+            browser_start = checkpoint.last_page(browser_key) + 1 if checkpoint else 1
+            emitted = {'rows': 0}
+
+            def category_page(key):
+                def emit(page, rows):
+                    emitted['rows'] += len(rows)
+                    on_page(key, page, rows)
+                return emit
+
+            finished = False
+            if mode in ('auto', 'http') and browser_start == 1:
+                try:
+                    finished = scrape_category_http(base_url, category_page(base_url), api_url=api_url,
+                                                    start_page=http_start)
+                    # Without a browser to fall back on, an empty listing is taken at its word
+                    finished = finished or mode == 'http'
+                except Exception as e:
+                    if mode == 'http':
+                        raise
+                    print(f"HTTP listing failed for {category_name(base_url)}: {e}")
+
+            # Selenium only starts when the fast path produced nothing, so no page is written twice
+            if not finished and not emitted['rows'] and http_start == 1 and mode in ('auto', 'browser'):
+                if driver is None:
+                    driver = new_browser(chrome_args)
+                finished = scrape_category_browser(driver, base_url, category_page(browser_key), browser_start)
+
+            if finished:
+                if checkpoint:
+                    checkpoint.finish(base_url)
+            else:
+                complete = False
+    finally:
+        if driver is not None:
+            driver.quit()
+            print_wait_summary()
+
+    return complete
+
+
+def main(urls, output_file, chrome_args=(), argv=None):
+    """Command line entry point shared by food.py and fruits.py"""
+    parser = argparse.ArgumentParser(description="Scrape Cargills Online product categories")
+    parser.add_argument('--category', action='append', dest='urls',
+                        help="category URL to scrape (repeatable, replaces the defaults)")
+    parser.add_argument('--mode', choices=('auto', 'http', 'browser'), default='auto',
+                        help="http = listing endpoint only, browser = Selenium only, auto = http with browser fallback")
+    parser.add_argument('--api-url', default=API_URL, help="listing endpoint, e.g. a local stand-in server")
+    parser.add_argument('--output', default=output_file)
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: from --output)")
+    parser.add_argument('--resume', action='store_true', help="continue the last interrupted run from its checkpoint")
+    metrics.add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    sink, checkpoint = open_checkpointed_sink(args.output, args.format, args.resume)
+    with sink:
+        def on_page(key, page, rows):
+            sink.write_many(checkpoint.new_rows(rows))
+            checkpoint.page_done(page, sink, key)
+
+        complete = scrape_categories(args.urls or urls, on_page, args.mode, args.api_url, chrome_args, checkpoint)
+        finish_run(sink, checkpoint, complete)
+    metrics.write_reports(source_name(args.output), args.metrics_json, args.metrics_prom)
+
+    if not complete:
+        return False
+    if sink.rows_written:
+        print(f"Scraped {sink.rows_written} items and saved to {sink.path}")
+    else:
+        print("No data scraped.")
+    return True
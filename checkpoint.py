@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+
+import metrics
+from atomic import write_atomic
+from sinks import open_sink, output_path
+
+
+def checkpoint_path(path):
+    """Checkpoint file kept next to a crawl's output"""
+    return path + '.checkpoint'
+
+
+def row_key(row):
+    """Short stable digest of a row, used for the seen-row set"""
+    text = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Progress of a paginated crawl, saved after every completed page
+
+    For each crawl key (a category URL, or 'pages' for single-listing
+    crawls) it records the last page whose rows reached the output. Along
+    with that it keeps the sink's state (row count and byte offset of its
+    part file) and digests of every row written, so a rerun with --resume
+    can truncate the part file to the last checkpoint, append from the next
+    page on, and skip rows that shifted onto later pages in the meantime.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.finished = set()
+        self.seen = set()
+        self.sink_state = None
+        self.enabled = True
+
+    @classmethod
+    def open(cls, path, resume=False):
+        """Load the checkpoint at path when resuming, otherwise start a fresh one"""
+        checkpoint = cls(path)
+        if not resume:
+            return checkpoint
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            print(f"No checkpoint at {path}, starting from the first page")
+            return checkpoint
+
+        sink_state = state.get('sink')
+        if sink_state and sink_state['offset'] and not (
+                os.path.exists(sink_state['part_path'])
+                and os.path.getsize(sink_state['part_path']) >= sink_state['offset']):
+            print(f"Partial output {sink_state['part_path']} is missing or short, starting from the first page")
+            return checkpoint
+
+        checkpoint.pages = state.get('pages', {})
+        checkpoint.finished = set(state.get('finished', []))
+        checkpoint.seen = set(state.get('seen', []))
+        checkpoint.sink_state = sink_state
+        done = ', '.join(f"{key}: page {page}" for key, page in checkpoint.pages.items())
+        print(f"Resuming from checkpoint ({done or 'no pages yet'})")
+        return checkpoint
+
+    def last_page(self, key='pages'):
+        return self.pages.get(key, 0)
+
+    def new_rows(self, rows):
+        """Drop rows already written in this run or the one being resumed"""
+        fresh = []
+        for row in rows:
+            key = row_key(row)
+            if key not in self.seen:
+                self.seen.add(key)
+                fresh.append(row)
+        return fresh
+
+    def page_done(self, page, sink, key='pages'):
+        """Record page as complete once its rows are flushed to the sink"""
+        if self.enabled:
+            sink.flush()
+            self.pages[key] = page
+            self.sink_state = sink.state()
+            self.save()
+        # After the flush, so the page's write time is counted with it
+        metrics.record_page(key, page, sink.rows_received)
+
+    def finish(self, key):
+        """Record that the crawl for key ran to its last page"""
+        self.finished.add(key)
+        self.save()
+
+    def save(self):
+        if not self.enabled:
+            return
+        state = {
+            'pages': self.pages,
+            'finished': sorted(self.finished),
+            'sink': self.sink_state,
+            'seen': sorted(self.seen),
+        }
+        write_atomic(self.path, json.dumps(state))
+
+    def remove(self):
+        """Drop the checkpoint once the output has been published"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def open_checkpointed_sink(output, format=None, resume=False):
+    """Open the sink for output together with its checkpoint
+
+    With resume, the sink continues the part file left by the previous run.
+    Outputs that cannot be appended to (Parquet) are never checkpointed.
+    """
+    path = output_path(output, format)
+    checkpoint = Checkpoint.open(checkpoint_path(path), resume)
+    sink = open_sink(output, format, resume=checkpoint.sink_state)
+    checkpoint.enabled = sink.resumable
+    if resume and not sink.resumable:
+        print(f"{path} cannot be resumed, starting from the first page")
+    return sink, checkpoint
+
+
+def finish_run(sink, checkpoint, complete, replace=False):
+    """Publish the output of a complete run, or keep part file and checkpoint for --resume
+
+    replace is passed on to sink.close(): an empty complete run then removes
+    the previous output.
+    """
+    if complete:
+        sink.close(replace)
+        checkpoint.remove()
+    else:
+        sink.abort()
+        if checkpoint.enabled:
+            print(f"Crawl stopped early; rerun with --resume to continue from {checkpoint.path}")
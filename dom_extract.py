@@ -0,0 +1,146 @@
+from selenium.webdriver.common.by import By
+
+import metrics
+from extract_spec import field_selectors, finish_value
+
+# Each WebDriver call is an HTTP round trip to chromedriver, so reading a
+# 50 x 20 table cell by cell costs ~1,000 of them. These snippets walk the
+# DOM inside the page and hand everything back as JSON in a single call.
+
+TABLE_JS = """
+var tables = document.getElementsByTagName('table');
+if (tables.length <= arguments[0]) { return null; }
+var table = tables[arguments[0]];
+function texts(cells) {
+    return Array.prototype.map.call(cells, function (cell) { return cell.innerText.trim(); });
+}
+
+var allRows = table.querySelectorAll('tr');
+var headers = [];
+var headerRow = table.querySelector('thead tr');
+if (headerRow) {
+    headers = texts(headerRow.querySelectorAll('th'));
+} else if (allRows.length) {
+    var headerCells = allRows[0].querySelectorAll('th');
+    if (!headerCells.length) { headerCells = allRows[0].querySelectorAll('td'); }
+    headers = texts(headerCells);
+}
+headers = headers.filter(function (text) { return text; });
+
+var dataRows;
+var tbody = table.querySelector('tbody');
+if (tbody) {
+    dataRows = tbody.querySelectorAll('tr');
+} else {
+    dataRows = Array.prototype.filter.call(allRows, function (row) { return row.querySelector('td'); });
+    if (!dataRows.length) { dataRows = Array.prototype.slice.call(allRows, 1); }
+}
+
+var rows = Array.prototype.map.call(dataRows, function (row) {
+    var cells = row.querySelectorAll('td');
+    if (!cells.length) { cells = row.querySelectorAll('th'); }
+    return texts(cells);
+});
+return {headers: headers, rows: rows};
+"""
+
+CARDS_JS = """
+var locators = arguments[0];
+var fields = arguments[1];
+var cards = [];
+for (var i = 0; i < locators.length && !cards.length; i++) {
+    var how = locators[i][0], what = locators[i][1];
+    if (how === 'xpath') {
+        var found = document.evaluate(what, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var j = 0; j < found.snapshotLength; j++) { cards.push(found.snapshotItem(j)); }
+    } else {
+        cards = Array.prototype.slice.call(document.querySelectorAll(what));
+    }
+}
+
+function readAttr(el, name) {
+    // Match Selenium's get_attribute: prefer the (resolved) property, then the attribute
+    var value = (name in el && typeof el[name] === 'string') ? el[name] : el.getAttribute(name);
+    return value || null;
+}
+
+return cards.map(function (card) {
+    var record = {};
+    Object.keys(fields).forEach(function (name) {
+        var selectors = fields[name];
+        var value = null;
+        for (var k = 0; k < selectors.length && value === null; k++) {
+            var el = card.querySelector(selectors[k][0]);
+            var attrs = selectors[k][1];
+            if (!el) { continue; }
+            if (selectors[k][2] && !attrs.some(function (a) { return el.hasAttribute(a); })) { continue; }
+            if (attrs) {
+                for (var a = 0; a < attrs.length && !value; a++) { value = readAttr(el, attrs[a]); }
+                value = value || '';
+            } else {
+                value = el.innerText.trim();
+            }
+        }
+        record[name] = value;
+    });
+    return record;
+});
+"""
+
+
+@metrics.timed('extract')
+def extract_table(driver, table_index=0):
+    """Serialize one table's headers and row cell texts in a single script call
+
+    Returns (headers, rows), or None if the page has no such table.
+    """
+    result = driver.execute_script(TABLE_JS, table_index)
+    if result is None:
+        return None
+    return result['headers'], result['rows']
+
+
+def rows_to_items(headers, rows):
+    """Turn table rows (lists of cell texts) into dicts keyed by header"""
+    items = []
+    for cell_values in rows:
+        if not cell_values:
+            continue
+
+        # Skip if it's just the header row again
+        if cell_values == headers:
+            continue
+
+        # Skip empty rows
+        if not any(cell_values):
+            continue
+
+        item = {}
+        for i, cell_value in enumerate(cell_values):
+            if i < len(headers) and headers[i]:
+                item[headers[i]] = cell_value
+            else:
+                item[f'Column_{i}'] = cell_value
+
+        if item and any(item.values()):
+            items.append(item)
+    return items
+
+
+@metrics.timed('extract')
+def extract_cards(driver, card_locators, fields):
+    """Read every card's fields in a single script call
+
+    card_locators are Selenium (By, value) pairs tried in order until one
+    matches; only By.CSS_SELECTOR and By.XPATH are supported. fields is an
+    extract_spec fields spec, e.g. {'selectors': [css, ...]} for element
+    text or {'selectors': [...], 'attrs': [name, ...]} for the first
+    non-empty attribute, optionally with 'attr_required'. Missing fields
+    come back as their default (None).
+    """
+    for how, _ in card_locators:
+        if how not in (By.CSS_SELECTOR, By.XPATH):
+            raise ValueError(f"Unsupported card locator strategy: {how}")
+    selectors = {name: [list(selector) for selector in field_selectors(field)] for name, field in fields.items()}
+    cards = driver.execute_script(CARDS_JS, [list(locator) for locator in card_locators], selectors)
+    return [{name: finish_value(fields[name], card.get(name)) for name in fields} for card in cards]
@@ -1,52 +1,110 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
+import argparse
 from datetime import datetime
-import re
+
+import metrics
+from http_client import default_client
+from page_index import PageIndex
+from parsing import make_soup
+from sinks import FORMATS, open_sink
+from text_matcher import DECIMAL, NUMBER
 
 class CBSLEconomicScraper:
-    def __init__(self):
+    CURRENCIES = ('USD', 'GBP', 'EUR', 'INR', 'JPY', 'AUD', 'CAD', 'CHF')
+    INFLATION_TYPES = ('CCPI', 'NCPI', 'Core CCPI')
+    RATE_TYPES = (
+        'Standing Deposit Facility Rate',
+        'Standing Lending Facility Rate',
+        'Bank Rate',
+        'Repo Rate',
+        'Reverse Repo Rate'
+    )
+    INDICATORS = (
+        'GDP Growth Rate',
+        'Unemployment Rate',
+        'Foreign Reserves',
+        'Government Debt',
+        'Current Account Balance',
+        'Trade Deficit'
+    )
+    
+    def __init__(self, http=None, format=None):
         self.base_url = "https://www.cbsl.gov.lk"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.format = format  # Output format; None keeps the .csv files
+        # Shared keep-alive pool; pacing for cbsl.gov.lk comes from its token bucket
+        self.http = http or default_client()
+        self.session = self.http.session
         self.data = {
             'exchange_rates': [],
             'inflation_data': [],
             'interest_rates': [],
             'economic_indicators': []
         }
+        # In-run memo of responses and parsed trees, keyed by URL
+        self._responses = {}
+        self._failures = {}
+        self._soups = {}
+        self._indexes = {}
+    
+    def fetch_soup(self, url):
+        """Download and parse a page at most once per run"""
+        if url not in self._soups:
+            if url in self._failures:
+                raise self._failures[url]
+            if url not in self._responses:
+                # Transient failures are retried by the client; what is left fails every item on the page
+                try:
+                    response = self.http.get(url)
+                    response.raise_for_status()
+                except Exception as e:
+                    self._failures[url] = e
+                    raise
+                self._responses[url] = response
+            # Parsed in full: the text fallbacks read labels from any element, divs and list items included
+            self._soups[url] = make_soup(self._responses[url].text)
+        return self._soups[url]
+    
+    def fetch_soup_or_none(self, url):
+        """fetch_soup, or None if the page failed for good; its items are then recorded as N/A"""
+        try:
+            return self.fetch_soup(url)
+        except Exception as e:
+            print(f"Giving up on {url}: {e}")
+            return None
+    
+    def failed_urls(self):
+        """Pages that could not be fetched in this run"""
+        return list(self._failures)
+    
+    def page_index(self, soup):
+        """Build the label/number index for a parsed page once and reuse it"""
+        key = id(soup)
+        if key not in self._indexes:
+            # Keep the soup alive alongside its index so the id is never reused
+            self._indexes[key] = (soup, PageIndex(soup))
+        return self._indexes[key][1]
+    
+    def labels_with(self, labels, item):
+        """Return the label list an extractor should scan for, including item"""
+        return labels if item in labels else labels + (item,)
     
+    @metrics.timed('cbsl.get_exchange_rates')
     def get_exchange_rates(self):
         """Scrape current exchange rates for major currencies"""
         print("Scraping Exchange Rates...")
         
         try:
-            # Get USD/LKR rate
             usd_url = f"{self.base_url}/rates-and-indicators/exchange-rates/daily-indicative-usd-spot-exchange-rates"
-            response = self.session.get(usd_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            rates_url = f"{self.base_url}/rates-and-indicators/exchange-rates/daily-indicative-exchange-rates"
             
-            # Try to find exchange rate data in tables or specific elements
-            tables = soup.find_all('table')
-            
-            currencies = ['USD', 'GBP', 'EUR', 'INR', 'JPY', 'AUD', 'CAD', 'CHF']
-            
-            for currency in currencies:
+            for currency in self.CURRENCIES:
                 try:
-                    # Try different URL patterns for each currency
-                    if currency == 'USD':
-                        rate_url = f"{self.base_url}/rates-and-indicators/exchange-rates/daily-indicative-usd-spot-exchange-rates"
-                    else:
-                        rate_url = f"{self.base_url}/rates-and-indicators/exchange-rates/daily-indicative-exchange-rates"
-                    
-                    response = self.session.get(rate_url)
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    # USD has its own spot page; every other currency shares one page,
+                    # which fetch_soup downloads and parses only once
+                    rate_url = usd_url if currency == 'USD' else rates_url
+                    soup = self.fetch_soup_or_none(rate_url)
                     
                     # Look for rate information in various possible locations
-                    rate_value = self.extract_rate_from_page(soup, currency)
+                    rate_value = self.extract_rate_from_page(soup, currency) if soup is not None else None
                     
                     if rate_value:
                         self.data['exchange_rates'].append({
@@ -68,8 +126,6 @@ class CBSLEconomicScraper:
                         })
                         print(f"{currency} rate not found")
                     
-                    time.sleep(1)  # Be respectful to the server
-                    
                 except Exception as e:
                     print(f"Error scraping {currency}: {e}")
                     continue
@@ -77,58 +133,40 @@ class CBSLEconomicScraper:
         except Exception as e:
             print(f"Error scraping exchange rates: {e}")
     
+    @metrics.timed('extract')
     def extract_rate_from_page(self, soup, currency):
         """Extract exchange rate from the page content"""
         try:
-            # Look for tables containing rate data
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    for cell in cells:
-                        text = cell.get_text(strip=True)
-                        if currency in text:
-                            # Look for number in nearby cells
-                            for sibling in cells:
-                                sibling_text = sibling.get_text(strip=True)
-                                # Look for decimal numbers
-                                rate_match = re.search(r'\d+\.\d+', sibling_text)
-                                if rate_match:
-                                    return rate_match.group()
+            index = self.page_index(soup)
             
-            # Alternative: Look for specific rate patterns in text
-            text_content = soup.get_text()
-            pattern = rf'{currency}[:\s]*(\d+\.\d+)'
-            match = re.search(pattern, text_content, re.IGNORECASE)
-            if match:
-                return match.group(1)
-                
-            return None
+            # Look for a table row labelled with the currency code that carries a rate
+            for row, column in index.find(currency, word=True):
+                rate_value = index.first_number(row)
+                if rate_value:
+                    return rate_value
+            
+            # Alternative: Look for "<currency>: <rate>" in text, one scan for all currencies
+            found, _ = index.match(self.labels_with(self.CURRENCIES, currency), DECIMAL)
+            return found.get(currency)
             
         except Exception as e:
             print(f"Error extracting rate for {currency}: {e}")
             return None
     
+    @metrics.timed('cbsl.get_inflation_data')
     def get_inflation_data(self):
         """Scrape inflation rates and consumer price index data"""
         print("Scraping Inflation Data...")
         
         try:
             inflation_url = f"{self.base_url}/measures-of-consumer-price-inflation"
-            response = self.session.get(inflation_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Look for inflation data in tables or specific elements
-            tables = soup.find_all('table')
+            soup = self.fetch_soup_or_none(inflation_url)
             
             # Try to extract CCPI and NCPI data
-            inflation_types = ['CCPI', 'NCPI', 'Core CCPI']
-            
-            for inflation_type in inflation_types:
+            for inflation_type in self.INFLATION_TYPES:
                 try:
                     # Extract inflation rate from page content
-                    inflation_rate = self.extract_inflation_rate(soup, inflation_type)
+                    inflation_rate = self.extract_inflation_rate(soup, inflation_type) if soup is not None else None
                     
                     self.data['inflation_data'].append({
                         'Inflation_Type': inflation_type,
@@ -147,37 +185,25 @@ class CBSLEconomicScraper:
         except Exception as e:
             print(f"Error scraping inflation data: {e}")
     
+    @metrics.timed('extract')
     def extract_inflation_rate(self, soup, inflation_type):
         """Extract inflation rate from page content"""
         try:
-            text_content = soup.get_text()
-            
-            # Look for patterns like "CCPI: 1.5%" or "inflation 1.5%"
-            patterns = [
-                rf'{inflation_type}[:\s]*(\d+\.\d+)%',
-                rf'{inflation_type}[:\s]*(\d+\.\d+)',
-                rf'inflation[:\s]*(\d+\.\d+)%'
-            ]
+            index = self.page_index(soup)
             
-            for pattern in patterns:
-                match = re.search(pattern, text_content, re.IGNORECASE)
-                if match:
-                    return match.group(1)
+            # Look for patterns like "CCPI: 1.5%", "CCPI 1.5" or "inflation 1.5%",
+            # in that order of preference, with a single scan for all types
+            labels = self.labels_with(self.INFLATION_TYPES, inflation_type) + ('inflation',)
+            found, with_percent = index.match(labels, DECIMAL, '%')
+            rate_value = with_percent.get(inflation_type) or found.get(inflation_type) or with_percent.get('inflation')
+            if rate_value:
+                return rate_value
             
-            # Look in tables
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    for i, cell in enumerate(cells):
-                        if inflation_type.lower() in cell.get_text().lower():
-                            # Look for rate in next cells
-                            if i + 1 < len(cells):
-                                rate_text = cells[i + 1].get_text(strip=True)
-                                rate_match = re.search(r'(\d+\.\d+)', rate_text)
-                                if rate_match:
-                                    return rate_match.group(1)
+            # Look in tables for the rate in the cell after the label
+            for row, column in index.find(inflation_type):
+                rate_value = index.number_at(row, column + 1)
+                if rate_value:
+                    return rate_value
             
             return None
             
@@ -185,26 +211,18 @@ class CBSLEconomicScraper:
             print(f"Error extracting inflation rate for {inflation_type}: {e}")
             return None
     
+    @metrics.timed('cbsl.get_interest_rates')
     def get_interest_rates(self):
         """Scrape policy interest rates and other monetary policy data"""
         print("Scraping Interest Rates...")
         
         try:
             interest_url = f"{self.base_url}/rates-and-indicators/policy-rates"
-            response = self.session.get(interest_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            rate_types = [
-                'Standing Deposit Facility Rate',
-                'Standing Lending Facility Rate', 
-                'Bank Rate',
-                'Repo Rate',
-                'Reverse Repo Rate'
-            ]
+            soup = self.fetch_soup_or_none(interest_url)
             
-            for rate_type in rate_types:
+            for rate_type in self.RATE_TYPES:
                 try:
-                    rate_value = self.extract_interest_rate(soup, rate_type)
+                    rate_value = self.extract_interest_rate(soup, rate_type) if soup is not None else None
                     
                     self.data['interest_rates'].append({
                         'Rate_Type': rate_type,
@@ -223,61 +241,46 @@ class CBSLEconomicScraper:
         except Exception as e:
             print(f"Error scraping interest rates: {e}")
     
+    @metrics.timed('extract')
     def extract_interest_rate(self, soup, rate_type):
         """Extract interest rate from page content"""
         try:
-            # Look in tables first
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    for i, cell in enumerate(cells):
-                        cell_text = cell.get_text(strip=True)
-                        if any(word in cell_text.lower() for word in rate_type.lower().split()):
-                            # Look for rate in nearby cells
-                            for j in range(max(0, i-1), min(len(cells), i+3)):
-                                if j != i:
-                                    rate_text = cells[j].get_text(strip=True)
-                                    rate_match = re.search(r'(\d+\.\d+)', rate_text)
-                                    if rate_match:
-                                        return rate_match.group(1)
+            index = self.page_index(soup)
             
-            # Look in general text
-            text_content = soup.get_text()
-            pattern = rf'{rate_type}[:\s]*(\d+\.\d+)%?'
-            match = re.search(pattern, text_content, re.IGNORECASE)
-            if match:
-                return match.group(1)
-                
-            return None
+            # Look in tables first: any cell sharing a word with the rate type
+            positions = set()
+            for word in rate_type.lower().split():
+                positions.update(index.find(word))
+            
+            for row, column in sorted(positions):
+                # Look for rate in nearby cells
+                for j in range(max(0, column - 1), column + 3):
+                    if j != column:
+                        rate_value = index.number_at(row, j)
+                        if rate_value:
+                            return rate_value
+            
+            # Look in general text, one scan for all rate types
+            found, _ = index.match(self.labels_with(self.RATE_TYPES, rate_type), DECIMAL)
+            return found.get(rate_type)
             
         except Exception as e:
             print(f"Error extracting interest rate for {rate_type}: {e}")
             return None
     
+    @metrics.timed('cbsl.get_economic_indicators')
     def get_economic_indicators(self):
         """Scrape general economic statistics and indicators"""
         print("Scraping Economic Indicators...")
         
         try:
             indicators_url = f"{self.base_url}/statistics/economic-indicators/daily-indicators"
-            response = self.session.get(indicators_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self.fetch_soup_or_none(indicators_url)
             
             # Look for various economic indicators
-            indicators = [
-                'GDP Growth Rate',
-                'Unemployment Rate',
-                'Foreign Reserves',
-                'Government Debt',
-                'Current Account Balance',
-                'Trade Deficit'
-            ]
-            
-            for indicator in indicators:
+            for indicator in self.INDICATORS:
                 try:
-                    value = self.extract_economic_indicator(soup, indicator)
+                    value = self.extract_economic_indicator(soup, indicator) if soup is not None else None
                     
                     self.data['economic_indicators'].append({
                         'Indicator': indicator,
@@ -297,20 +300,17 @@ class CBSLEconomicScraper:
         except Exception as e:
             print(f"Error scraping economic indicators: {e}")
     
+    @metrics.timed('extract')
     def extract_economic_indicator(self, soup, indicator):
         """Extract economic indicator value from page content"""
         try:
             # This is a simplified extraction - in practice, you'd need
             # to analyze the specific page structure for each indicator
-            text_content = soup.get_text()
+            index = self.page_index(soup)
             
-            # Look for the indicator followed by a number
-            pattern = rf'{indicator}[:\s]*(\d+\.\d+|\d+)'
-            match = re.search(pattern, text_content, re.IGNORECASE)
-            if match:
-                return match.group(1)
-                
-            return None
+            # Look for the indicator followed by a number, one scan for all indicators
+            found, _ = index.match(self.labels_with(self.INDICATORS, indicator), NUMBER)
+            return found.get(indicator)
             
         except Exception as e:
             print(f"Error extracting {indicator}: {e}")
@@ -348,6 +348,12 @@ class CBSLEconomicScraper:
         
         print("Scraping completed!")
     
+    def write_rows(self, path, rows):
+        """Write rows to path through a sink, so a failed save never leaves a partial file"""
+        with open_sink(path, self.format) as sink:
+            sink.write_many(rows)
+        return sink.path
+    
     def save_to_csv(self):
         """Save all scraped data to CSV files"""
         print("Saving data to CSV files...")
@@ -355,27 +361,23 @@ class CBSLEconomicScraper:
         try:
             # Save exchange rates
             if self.data['exchange_rates']:
-                df_exchange = pd.DataFrame(self.data['exchange_rates'])
-                df_exchange.to_csv('cbsl_exchange_rates.csv', index=False)
-                print(f"Saved {len(self.data['exchange_rates'])} exchange rates to cbsl_exchange_rates.csv")
+                path = self.write_rows('cbsl_exchange_rates.csv', self.data['exchange_rates'])
+                print(f"Saved {len(self.data['exchange_rates'])} exchange rates to {path}")
             
             # Save inflation data
             if self.data['inflation_data']:
-                df_inflation = pd.DataFrame(self.data['inflation_data'])
-                df_inflation.to_csv('cbsl_inflation_data.csv', index=False)
-                print(f"Saved {len(self.data['inflation_data'])} inflation records to cbsl_inflation_data.csv")
+                path = self.write_rows('cbsl_inflation_data.csv', self.data['inflation_data'])
+                print(f"Saved {len(self.data['inflation_data'])} inflation records to {path}")
             
             # Save interest rates
             if self.data['interest_rates']:
-                df_interest = pd.DataFrame(self.data['interest_rates'])
-                df_interest.to_csv('cbsl_interest_rates.csv', index=False)
-                print(f"Saved {len(self.data['interest_rates'])} interest rates to cbsl_interest_rates.csv")
+                path = self.write_rows('cbsl_interest_rates.csv', self.data['interest_rates'])
+                print(f"Saved {len(self.data['interest_rates'])} interest rates to {path}")
             
             # Save economic indicators
             if self.data['economic_indicators']:
-                df_indicators = pd.DataFrame(self.data['economic_indicators'])
-                df_indicators.to_csv('cbsl_economic_indicators.csv', index=False)
-                print(f"Saved {len(self.data['economic_indicators'])} indicators to cbsl_economic_indicators.csv")
+                path = self.write_rows('cbsl_economic_indicators.csv', self.data['economic_indicators'])
+                print(f"Saved {len(self.data['economic_indicators'])} indicators to {path}")
             
             # Create a combined summary file
             self.create_summary_report()
@@ -383,63 +385,81 @@ class CBSLEconomicScraper:
         except Exception as e:
             print(f"Error saving data: {e}")
     
+    def summary_rows(self):
+        """All scraped data as (Category, Item, Value, Unit, Date, Source) rows"""
+        summary_data = []
+        
+        # Add exchange rates summary
+        for rate in self.data['exchange_rates']:
+            summary_data.append({
+                'Category': 'Exchange Rate',
+                'Item': f"{rate['Currency']}/LKR",
+                'Value': rate['Rate_LKR'],
+                'Unit': 'LKR',
+                'Date': rate['Date'],
+                'Source': rate['Source']
+            })
+        
+        # Add inflation data summary
+        for inflation in self.data['inflation_data']:
+            summary_data.append({
+                'Category': 'Inflation',
+                'Item': inflation['Inflation_Type'],
+                'Value': inflation['Rate_Percent'],
+                'Unit': '%',
+                'Date': inflation['Date'],
+                'Source': inflation['Source']
+            })
+        
+        # Add interest rates summary
+        for rate in self.data['interest_rates']:
+            summary_data.append({
+                'Category': 'Interest Rate',
+                'Item': rate['Rate_Type'],
+                'Value': rate['Rate_Percent'],
+                'Unit': '%',
+                'Date': rate['Date'],
+                'Source': rate['Source']
+            })
+        
+        # Add economic indicators summary
+        for indicator in self.data['economic_indicators']:
+            summary_data.append({
+                'Category': 'Economic Indicator',
+                'Item': indicator['Indicator'],
+                'Value': indicator['Value'],
+                'Unit': indicator['Unit'],
+                'Date': indicator['Date'],
+                'Source': indicator['Source']
+            })
+        
+        return summary_data
+    
     def create_summary_report(self):
         """Create a comprehensive summary report"""
         try:
-            summary_data = []
-            
-            # Add exchange rates summary
-            for rate in self.data['exchange_rates']:
-                summary_data.append({
-                    'Category': 'Exchange Rate',
-                    'Item': f"{rate['Currency']}/LKR",
-                    'Value': rate['Rate_LKR'],
-                    'Unit': 'LKR',
-                    'Date': rate['Date'],
-                    'Source': rate['Source']
-                })
-            
-            # Add inflation data summary
-            for inflation in self.data['inflation_data']:
-                summary_data.append({
-                    'Category': 'Inflation',
-                    'Item': inflation['Inflation_Type'],
-                    'Value': inflation['Rate_Percent'],
-                    'Unit': '%',
-                    'Date': inflation['Date'],
-                    'Source': inflation['Source']
-                })
-            
-            # Add interest rates summary
-            for rate in self.data['interest_rates']:
-                summary_data.append({
-                    'Category': 'Interest Rate',
-                    'Item': rate['Rate_Type'],
-                    'Value': rate['Rate_Percent'],
-                    'Unit': '%',
-                    'Date': rate['Date'],
-                    'Source': rate['Source']
-                })
-            
-            # Add economic indicators summary
-            for indicator in self.data['economic_indicators']:
-                summary_data.append({
-                    'Category': 'Economic Indicator',
-                    'Item': indicator['Indicator'],
-                    'Value': indicator['Value'],
-                    'Unit': indicator['Unit'],
-                    'Date': indicator['Date'],
-                    'Source': indicator['Source']
-                })
+            summary_data = self.summary_rows()
             
             if summary_data:
-                df_summary = pd.DataFrame(summary_data)
-                df_summary.to_csv('cbsl_economic_summary.csv', index=False)
-                print(f"Created comprehensive summary with {len(summary_data)} total records in cbsl_economic_summary.csv")
+                path = self.write_rows('cbsl_economic_summary.csv', summary_data)
+                print(f"Created comprehensive summary with {len(summary_data)} total records in {path}")
                 
         except Exception as e:
             print(f"Error creating summary report: {e}")
     
+    def save_to_store(self, root=None):
+        """Append today's readings to the series store, keeping the history the CSVs overwrite"""
+        try:
+            # Imported here so only a scrape that keeps history loads NumPy
+            from series_store import STORE_DIR, SeriesStore
+
+            root = root or STORE_DIR
+            store = SeriesStore(root)
+            stored = store.append_rows(self.summary_rows())
+            print(f"Appended {stored} readings to the series store in {root}")
+        except Exception as e:
+            print(f"Error saving to series store: {e}")
+    
     def display_summary(self):
         """Display a summary of scraped data"""
         print("\n" + "=" * 60)
@@ -456,9 +476,17 @@ class CBSLEconomicScraper:
         print(f"Scraping Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
 
-def main():
+def main(argv=None):
     """Main function to run the scraper"""
-    scraper = CBSLEconomicScraper()
+    parser = argparse.ArgumentParser(description="Scrape CBSL economic indicators")
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: csv)")
+    parser.add_argument('--store', help="series store directory for the history of every reading "
+                                         "(default: $SCRAPER_SERIES_STORE or cbsl_series)")
+    metrics.add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    scraper = CBSLEconomicScraper(format=args.format)
+    complete = True
     
     try:
         # Scrape all data
@@ -466,14 +494,23 @@ def main():
         
         # Save to CSV files
         scraper.save_to_csv()
+        scraper.save_to_store(args.store)
         
         # Display summary
         scraper.display_summary()
         
     except Exception as e:
         print(f"Error in main execution: {e}")
+        complete = False
+    
+    # Pages that failed after their retries were saved as N/A; the run still counts as failed
+    if scraper.failed_urls():
+        print(f"Could not fetch {len(scraper.failed_urls())} page(s); their values were saved as N/A")
+        complete = False
     
     print("\nScraping process completed!")
+    metrics.write_reports('cbsl', args.metrics_json, args.metrics_prom)
+    return complete
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""Declarative card extraction, compiled once and run on a parsed page or in the browser
+
+A spec lists where the cards are and, for every output field, the CSS
+selectors to try in order:
+
+    AD_SPEC = CardSpec(
+        cards=["li.normal--2QYVk.gtm-normal-ad"],
+        fields={
+            'Title': {'selectors': ["img::attr(alt)", "h2.heading--2eONR"], 'default': "N/A"},
+            'Image_URL': {'selectors': ["img"], 'attrs': ["src", "data-src"]},
+            'Price': {'selectors': ["div.price span"], 'post': str.upper},
+        },
+    )
+
+A field is the text of the first element matched by its best selector,
+or with 'attrs' (or a selector ending in ::attr(name)) the first
+non-empty one of those attributes. With 'attr_required', an attribute
+selector whose first element carries none of the attributes gives way to
+the field's next selector instead of reading as ''. A field nothing
+matches is its 'default' (None when not given); 'post' is applied to
+every value found.
+Card locators are CSS selectors or Selenium (By, value) pairs; XPath
+locators only work in the browser.
+
+CardSpec.extract(soup) reads each card's fields in one walk over the card
+with selectors compiled once per process (plain predicates for simple
+tag/class/attribute selectors, soupsieve for the rest);
+CardSpec.extract_page(driver) sends the same spec to dom_extract's
+single-script extraction.
+"""
+import functools
+import re
+
+import soupsieve
+from bs4 import Tag
+
+CSS_SELECTOR = 'css selector'  # selenium.webdriver.common.by.By.CSS_SELECTOR
+ATTR_SUFFIX = re.compile(r'::attr\(\s*([^)\s]+)\s*\)$')
+# One compound selector: optional tag, then .class and [attr], [attr=v], [attr*=v], [attr^=v], [attr$=v] parts
+COMPOUND = re.compile(r'(?P<tag>[a-zA-Z][\w-]*)?(?P<parts>(?:\.[\w-]+|\[[\w-]+(?:[*^$]?=(?:\'[^\']*\'|"[^"]*"|[\w-]+))?\])*)$')
+PART = re.compile(r'\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)(?:(?P<op>[*^$]?=)(?P<value>\'[^\']*\'|"[^"]*"|[\w-]+))?\]')
+ATTR_TESTS = {
+    '=': lambda actual, value: actual == value,
+    '*=': lambda actual, value: value in actual,
+    '^=': lambda actual, value: actual.startswith(value),
+    '$=': lambda actual, value: actual.endswith(value),
+}
+
+
+def compound_test(text):
+    """Predicate for one compound selector such as div.price[data-x], or None if unsupported"""
+    match = COMPOUND.match(text)
+    if not text or match is None:
+        return None
+    tag = match['tag'].lower() if match['tag'] else None
+    classes = set()
+    attrs = []
+    for part in PART.finditer(match['parts']):
+        if part['cls']:
+            classes.add(part['cls'])
+        else:
+            value = part['value']
+            if value and value[0] in '\'"':
+                value = value[1:-1]
+            attrs.append((part['attr'], ATTR_TESTS.get(part['op']), value))
+
+    def test(element):
+        if tag and element.name != tag:
+            return False
+        if classes and not classes.issubset(element.get('class') or ()):
+            return False
+        for name, compare, value in attrs:
+            actual = element.get(name)
+            if actual is None:
+                return False
+            if compare:
+                if isinstance(actual, list):
+                    actual = ' '.join(actual)
+                if not compare(actual, value):
+                    return False
+        return True
+    return test
+
+
+class FastMatcher:
+    """Plain-Python match() for tag/class/attribute selectors joined by descendant spaces
+
+    soupsieve's general matcher costs several times more per element, and
+    listing specs only use this simple subset; anything else falls back to
+    soupsieve.
+    """
+
+    def __init__(self, tests):
+        self.last = tests[-1]
+        self.ancestors = tests[-2::-1]  # Innermost first
+
+    def match(self, element):
+        if not self.last(element):
+            return False
+        pending = iter(self.ancestors)
+        test = next(pending, None)
+        parent = element.parent
+        while test is not None:
+            if parent is None or parent.name == '[document]':
+                return False
+            if test(parent):
+                test = next(pending, None)
+            parent = parent.parent
+        return True
+
+
+@functools.lru_cache(maxsize=None)
+def compiled(selector):
+    """soupsieve selector for a CSS selector, compiled once per process"""
+    return soupsieve.compile(selector)
+
+
+@functools.lru_cache(maxsize=None)
+def element_matcher(selector):
+    """Fastest available match(element) for a CSS selector, compiled once per process"""
+    tests = [compound_test(part) for part in selector.split()]
+    if tests and all(tests):
+        return FastMatcher(tests)
+    return compiled(selector)
+
+
+def field_selectors(field):
+    """A field's selectors as (css, attrs, attr_required) triples; attrs is None to read text"""
+    selectors = []
+    for selector in field['selectors']:
+        match = ATTR_SUFFIX.search(selector)
+        if match:
+            css, attrs = selector[:match.start()].strip(), [match[1]]
+        else:
+            css, attrs = selector, list(field['attrs']) if field.get('attrs') else None
+        selectors.append((css, attrs, bool(attrs and field.get('attr_required'))))
+    return selectors
+
+
+def finish_value(field, value):
+    """Apply a field's default or post-processor to an extracted value"""
+    if value is None:
+        return field.get('default')
+    post = field.get('post')
+    return post(value) if post else value
+
+
+def element_value(element, attrs):
+    if attrs is None:
+        return element.get_text().strip()
+    for name in attrs:
+        value = element.get(name)
+        if isinstance(value, list):  # Multi-valued attributes such as class
+            value = ' '.join(value)
+        if value:
+            return value
+    return ''
+
+
+class CardSpec:
+    """Card locators and field selectors of one listing page"""
+
+    def __init__(self, cards, fields):
+        self.cards = [(CSS_SELECTOR, card) if isinstance(card, str) else tuple(card) for card in cards]
+        self.fields = fields
+        self.names = list(fields)
+        # Every (field, rank, selector) to test against an element, in field order
+        self.matchers = [(name, rank, element_matcher(css), attrs, required)
+                         for name, field in fields.items()
+                         for rank, (css, attrs, required) in enumerate(field_selectors(field))]
+
+    def find_cards(self, soup):
+        for how, what in self.cards:
+            if how != CSS_SELECTOR:
+                raise ValueError(f"Card locator {how!r} only works in the browser")
+            cards = compiled(what).select(soup)
+            if cards:
+                return cards
+        return []
+
+    def extract(self, soup):
+        """Records for every card in a parsed page"""
+        return [self.record(card) for card in self.find_cards(soup)]
+
+    def record(self, card):
+        """Read all fields of one card in a single walk over its elements
+
+        Each field keeps the first element, in document order, matched by
+        its best-ranked selector, which is what trying the selectors one
+        after another with select_one would give.
+        """
+        best = {}  # Field name -> (rank, element, attrs)
+        spent = set()  # attr_required selectors whose first element lacked the attributes
+        matchers = self.matchers
+        for element in card.descendants:
+            if not isinstance(element, Tag):
+                continue
+            improved = False
+            for name, rank, matcher, attrs, required in matchers:
+                found = best.get(name)
+                if (found is None or rank < found[0]) and matcher.match(element):
+                    if required and not any(attr in element.attrs for attr in attrs):
+                        spent.add((name, rank))
+                    else:
+                        best[name] = (rank, element, attrs)
+                    improved = True
+            if improved:
+                # Fields settled on their first selector need no more tests
+                matchers = [m for m in matchers if best.get(m[0], (None,))[0] != 0 and m[:2] not in spent]
+                if not matchers:
+                    break
+        record = {}
+        for name in self.names:
+            found = best.get(name)
+            record[name] = finish_value(self.fields[name], element_value(found[1], found[2]) if found else None)
+        return record
+
+    def extract_page(self, driver):
+        """Records for every card on the browser's current page, in one script call"""
+        from dom_extract import extract_cards
+        return extract_cards(driver, self.cards, self.fields)
@@ -0,0 +1,124 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from retry import default_policy, retryable_response
+from throttle import registry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Politeness settings per site: starting requests per second, burst size and open connections.
+# The rate then adapts between min_rate and max_rate (see throttle.py) unless the client is
+# created with adaptive=False. A host matches an entry when it equals it or is a subdomain of it.
+HOST_LIMITS = {
+    'ikman.lk': {'rate': 4.0, 'burst': 8, 'max_concurrency': 8},
+    'cbsl.gov.lk': {'rate': 1.0, 'burst': 2, 'max_concurrency': 2},
+    'cargillsonline.com': {'rate': 4.0, 'burst': 4, 'max_concurrency': 4},
+}
+DEFAULT_LIMITS = {'rate': 2.0, 'burst': 2, 'max_concurrency': 4}
+
+
+def record_response(response):
+    """Count a finished request, its bytes on the wire and any transport retries"""
+    metrics.count('requests')
+    # raw.tell() is the compressed size actually received; fall back to the decoded body
+    received = response.raw.tell() if hasattr(response.raw, 'tell') else 0
+    if not received and response._content_consumed:
+        received = len(response.content or b'')
+    metrics.count('bytes_downloaded', received)
+    retries = getattr(response.raw, 'retries', None)
+    if retries is not None and retries.history:
+        metrics.count('retries', len(retries.history))
+
+
+class HttpClient:
+    """Keep-alive requests session with per-host concurrency caps and rate limits"""
+
+    def __init__(self, headers=None, host_limits=None, pool_maxsize=16, timeout=30, adaptive=True, retry=None):
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.retry = retry or default_policy
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        adapter = HTTPAdapter(pool_connections=len(self.host_limits) + 1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def limits_for(self, host):
+        """Return the politeness settings that apply to a host"""
+        for domain, limits in self.host_limits.items():
+            if host == domain or host.endswith('.' + domain):
+                return limits
+        return DEFAULT_LIMITS
+
+    def throttle_for(self, host):
+        """The host's adaptive rate controller, shared with browser sessions"""
+        return registry.get(host, self.limits_for(host), self.adaptive)
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (
+                    self.throttle_for(host),
+                    threading.BoundedSemaphore(self.limits_for(host)['max_concurrency']),
+                )
+            return self._hosts[host]
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the shared pool, retrying transient failures
+
+        Connection errors, timeouts and 429/5xx responses are retried under
+        the client's retry policy; if they persist the error is raised, or
+        the last response is returned for the caller to check.
+        """
+        host = urlsplit(url).hostname or ''
+        kwargs.setdefault('timeout', self.timeout)
+        return self.retry.call(host, lambda: self.send(host, method, url, **kwargs), retry_result=retryable_response)
+
+    def send(self, host, method, url, **kwargs):
+        """Make one attempt at a request, respecting and adapting the host's limits"""
+        throttle, slots = self._host_state(host)
+        with slots:
+            waited = throttle.acquire()
+            if waited:
+                metrics.observe('throttle', waited)
+            start = time.monotonic()
+            try:
+                with metrics.timed('fetch'):
+                    response = self.session.request(method, url, **kwargs)
+            except requests.Timeout:
+                throttle.record(timed_out=True)
+                raise
+        throttle.record(time.monotonic() - start, status=response.status_code)
+        record_response(response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """Return the process-wide client so every scraper shares one pool"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
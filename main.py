@@ -1,85 +1,283 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-
-current_page = 1
-data = []
-proceed = True
-
-while proceed:
-    print("Scraping Page " + str(current_page))
-    url = "https://ikman.lk/en/ads/sri-lanka/property?sort=relevance&buy_now=0&urgent=0&query=boarding&page=" + str(current_page)
-    
-    try:
-        page = requests.get(url)
-        soup = BeautifulSoup(page.text, 'html.parser')
-        
-        # Check if page exists by looking for ads
-        all_ads = soup.find_all('li', class_="normal--2QYVk gtm-normal-ad")
-        
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import metrics
+from checkpoint import open_checkpointed_sink
+from extract_spec import CardSpec
+from http_client import default_client
+from page_order import PageOrder
+from parsing import IKMAN_AD_CARDS, make_soup
+from seen_index import IncrementalRun
+from sinks import FORMATS, source_name
+
+BASE_URL = "https://ikman.lk/en/ads/sri-lanka/property?{sort}&buy_now=0&urgent=0&query={query}&page={page}"
+QUERY = "boarding"
+SORTS = {
+    'relevance': 'sort=relevance',
+    'date': 'sort=date&order=desc',  # Newest first, which incremental runs rely on
+}
+MAX_PAGES = 50  # Add a reasonable limit to prevent infinite scraping
+CONCURRENCY = 8  # Pages in flight at once in async mode
+PARSERS = os.cpu_count() or 1  # Parser processes in pipeline mode
+QUEUE_SIZE = 16  # Downloaded pages waiting for a parser before the fetchers block
+# How parser processes are started; never plain fork, see crawl_pipeline
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+OUTPUT_FILE = 'boarding_houses.csv'
+
+# Ad card fields: the title is the first image's alt text, else (when that
+# image has no alt) the heading; the price is the span inside the price
+# block, else the whole block
+AD_SPEC = CardSpec(
+    cards=["li.normal--2QYVk.gtm-normal-ad"],
+    fields={
+        'Title': {'selectors': ["img::attr(alt)", "h2.heading--2eONR"], 'default': "N/A", 'attr_required': True},
+        'Price': {'selectors': ["div.price--3SnqI.color--t0tGX span", "div.price--3SnqI.color--t0tGX"], 'default': "N/A"},
+        'Description': {'selectors': ["div.description--2-ez3"], 'default': "N/A"},
+        'Details': {'selectors': ["div.details--1GUIn"], 'default': "N/A"},
+    },
+)
+
+
+def page_url(page_number, query=QUERY, sort='relevance'):
+    """Build the results URL for one page of a query"""
+    return BASE_URL.format(sort=SORTS[sort], query=query, page=page_number)
+
+
+def fetch_page(page_number, query=QUERY, sort='relevance'):
+    """Download one results page and return its HTML"""
+    page = default_client().get(page_url(page_number, query, sort))
+    # Transient failures were already retried; what is left fails the page
+    page.raise_for_status()
+    return page.text
+
+
+def parse_ads(html):
+    """Extract ad records from one results page"""
+    # Only the ad cards are built into a tree
+    return ads_from_soup(make_soup(html, parse_only=IKMAN_AD_CARDS))
+
+
+@metrics.timed('extract')
+def ads_from_soup(soup):
+    """Read the fields of every ad card in a parsed results page"""
+    return AD_SPEC.extract(soup)
+
+
+def crawl_sequential(on_page, query=QUERY, max_pages=MAX_PAGES, start_page=1, sort='relevance'):
+    """Fetch result pages one by one until the first empty page
+
+    on_page(page_number, ads) is called as each page is scraped; returning
+    True from it ends the crawl after that page. Returns False if a failing
+    page stopped the crawl before its end.
+    """
+    current_page = start_page
+
+    while current_page <= max_pages:
+        print("Scraping Page " + str(current_page))
+
+        try:
+            all_ads = parse_ads(fetch_page(current_page, query, sort))
+        except Exception as e:
+            print(f"Error scraping page {current_page}: {e}")
+            return False
+
         if not all_ads:  # No ads found, probably reached the end
-            proceed = False
             print("No more ads found. Scraping complete.")
+            break
+
+        if on_page(current_page, all_ads):
+            break
+        current_page += 1
+    else:
+        print("Reached page limit. Stopping.")
+    return True
+
+
+async def crawl_async(on_page, query=QUERY, max_pages=MAX_PAGES, concurrency=CONCURRENCY, start_page=1,
+                      sort='relevance'):
+    """Fetch result pages concurrently, keeping the stop-at-first-empty-page rule
+
+    on_page(page_number, ads) is called in page order: a finished page is
+    held back until every page before it has been handed over. Returning
+    True from on_page ends the crawl after that page. Returns False if a
+    failing page stopped the crawl before its end.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    order = PageOrder(on_page, start_page, max_pages)
+
+    async def scrape(page_number):
+        async with semaphore:
+            print("Scraping Page " + str(page_number))
+            html = await asyncio.to_thread(fetch_page, page_number, query, sort)
+        return parse_ads(html)
+
+    tasks = {asyncio.create_task(scrape(n)): n for n in range(start_page, max_pages + 1)}
+    pending = set(tasks)
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            page_number = tasks[task]
+            if task.cancelled() or not order.wanted(page_number):
+                continue
+
+            try:
+                all_ads = task.result()
+            except Exception as e:
+                print(f"Error scraping page {page_number}: {e}")
+                all_ads = None
+
+            if order.finish(page_number, all_ads) and all_ads == []:
+                print(f"No more ads found after page {page_number - 1}. Scraping complete.")
+
+            # Cancel every request past the last page, queued or in flight
+            for other in pending:
+                if not order.wanted(tasks[other]):
+                    other.cancel()
+
+    if order.stop_at == max_pages + 1:
+        print("Reached page limit. Stopping.")
+    return not order.failed
+
+
+def parse_worker(html):
+    """Parse one page in a pool process; returns its ads and the timings recorded doing it"""
+    return parse_ads(html), metrics.metrics.drain()
+
+
+def crawl_pipeline(on_page, query=QUERY, max_pages=MAX_PAGES, fetchers=CONCURRENCY, parsers=PARSERS, start_page=1,
+                   sort='relevance'):
+    """Download pages on fetcher threads and parse them on a pool of processes
+
+    Fetchers take the next page number from a shared counter and put the
+    raw HTML on a bounded queue, so they block once the parsers fall
+    QUEUE_SIZE pages behind; parsing is likewise capped at two pages per
+    parser process. on_page(page_number, ads) is called in page order,
+    and returning True from it ends the crawl after that page. Returns
+    False if a failing page stopped the crawl before its end.
+    """
+    order = PageOrder(on_page, start_page, max_pages)
+    downloaded = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def fetcher():
+        try:
+            while True:
+                page_number = order.claim()
+                if page_number is None:
+                    return
+
+                print("Scraping Page " + str(page_number))
+                try:
+                    html = fetch_page(page_number, query, sort)
+                except Exception as e:
+                    print(f"Error scraping page {page_number}: {e}")
+                    html = None
+                downloaded.put((page_number, html))
+        finally:
+            downloaded.put(None)  # This fetcher is done
+
+    def finish(page_number, all_ads):
+        """Hand over a parsed page; all_ads is None for a failed page"""
+        if order.finish(page_number, all_ads) and all_ads == []:
+            print(f"No more ads found after page {page_number - 1}. Scraping complete.")
+
+    def collect(futures, block):
+        done, _ = wait(futures, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            page_number = futures.pop(future)
+            try:
+                all_ads, (stages, counters) = future.result()
+                metrics.metrics.merge(stages, counters)
+            except Exception as e:
+                print(f"Error scraping page {page_number}: {e}")
+                all_ads = None
+            finish(page_number, all_ads)
+
+    # Parsers start from a fresh interpreter rather than a fork of this one: a
+    # fork taken while another thread holds a lock (the metrics registry's,
+    # say) would leave that lock held forever in the child
+    with ProcessPoolExecutor(max_workers=parsers, mp_context=multiprocessing.get_context(START_METHOD)) as pool:
+        threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetchers)]
+        for thread in threads:
+            thread.start()
+
+        futures = {}
+        running = fetchers
+        while running:
+            item = downloaded.get()
+            if item is None:
+                running -= 1
+                continue
+            page_number, html = item
+            if html is None:
+                finish(page_number, None)
+            elif order.wanted(page_number):
+                while len(futures) >= 2 * parsers:
+                    collect(futures, block=True)
+                futures[pool.submit(parse_worker, html)] = page_number
+            collect(futures, block=False)
+        while futures:
+            collect(futures, block=True)
+
+    if order.stop_at == max_pages + 1:
+        print("Reached page limit. Stopping.")
+    return not order.failed
+
+
+def main(argv=None):
+    """Crawl ikman boarding listings and save them to CSV"""
+    parser = argparse.ArgumentParser(description="Scrape ikman.lk property search results")
+    parser.add_argument('--query', default=QUERY, help="search query string")
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES)
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                        help="pages in flight at once (1 = sequential crawl)")
+    parser.add_argument('--parsers', type=int, default=PARSERS,
+                        help="parser processes fed by the downloads (0 = parse on the event loop)")
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: from --output)")
+    parser.add_argument('--resume', action='store_true', help="continue the last interrupted run from its checkpoint")
+    parser.add_argument('--incremental', action='store_true',
+                        help="write only new or changed ads and stop at the first page with no new ones")
+    parser.add_argument('--index', help="seen-ads index for --incremental (default: next to --output)")
+    parser.add_argument('--sort', choices=SORTS, help="result order (default: date with --incremental, else relevance)")
+    metrics.add_report_args(parser)
+    args = parser.parse_args(argv)
+    sort = args.sort or ('date' if args.incremental else 'relevance')
+
+    # Rows are written as pages arrive and checkpointed page by page
+    sink, checkpoint = open_checkpointed_sink(args.output, args.format, args.resume)
+    with IncrementalRun(args.output, args.incremental, args.index, args.resume) as seen, sink:
+        def on_page(page_number, ads):
+            ads, known = seen.check_page(ads)
+            sink.write_many(checkpoint.new_rows(ads))
+            checkpoint.page_done(page_number, sink)
+            if known:
+                # Results are newest first, so nothing past this page is new
+                print(f"Page {page_number} holds only known ads. Stopping.")
+            return known
+
+        start_page = checkpoint.last_page() + 1
+        if args.concurrency > 1 and args.parsers > 0:
+            complete = crawl_pipeline(on_page, args.query, args.max_pages, args.concurrency, args.parsers, start_page,
+                                      sort)
+        elif args.concurrency > 1:
+            complete = asyncio.run(crawl_async(on_page, args.query, args.max_pages, args.concurrency, start_page, sort))
         else:
-            for ads in all_ads:
-                item = {}
-                
-                # Get title from img alt attribute
-                img_tag = ads.find("img")
-                if img_tag and 'alt' in img_tag.attrs:
-                    item['Title'] = img_tag.attrs['alt']
-                else:
-                    # Fallback: try to get title from h2 heading
-                    title_tag = ads.find("h2", class_="heading--2eONR")
-                    if title_tag:
-                        item['Title'] = title_tag.text.strip()
-                    else:
-                        item['Title'] = "N/A"
-                
-                # Get price from div with correct classes
-                price_tag = ads.find("div", class_="price--3SnqI color--t0tGX")
-                if price_tag:
-                    # Get the span inside the price div
-                    price_span = price_tag.find("span")
-                    if price_span:
-                        item['Price'] = price_span.text.strip()
-                    else:
-                        item['Price'] = price_tag.text.strip()
-                else:
-                    item['Price'] = "N/A"
-                
-                # Get description from div (not p tag)
-                desc_tag = ads.find("div", class_="description--2-ez3")
-                if desc_tag:
-                    item['Description'] = desc_tag.text.strip()
-                else:
-                    item['Description'] = "N/A"
-                
-                # Get additional details if available
-                details_tag = ads.find("div", class_="details--1GUIn")
-                if details_tag:
-                    item['Details'] = details_tag.text.strip()
-                else:
-                    item['Details'] = "N/A"
-                
-                data.append(item)
-            
-            # Increment page AFTER processing all ads on current page
-            current_page += 1
-            
-            # Add a reasonable limit to prevent infinite scraping
-            if current_page > 50:  # Adjust this limit as needed
-                proceed = False
-                print("Reached page limit. Stopping.")
-                
-    except Exception as e:
-        print(f"Error scraping page {current_page}: {e}")
-        proceed = False
-
-# Save data to CSV
-if data:
-    df = pd.DataFrame(data)
-    df.to_csv('boarding_houses.csv', index=False)
-    print(f"Scraped {len(data)} listings and saved to boarding_houses.csv")
+            complete = crawl_sequential(on_page, args.query, args.max_pages, start_page, sort)
+        seen.finish(sink, checkpoint, complete)
+
+    if complete and sink.rows_written:
+        print(f"Scraped {sink.rows_written} listings and saved to {sink.path}")
+    elif complete and args.incremental:
+        print("No new or changed listings.")
+    metrics.write_reports(source_name(args.output), args.metrics_json, args.metrics_prom)
+    return complete
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Per-stage timings and counters for a scraper run
+
+Code under measurement wraps work in timed('fetch') (a context manager or
+decorator) or reports a duration it already has with observe(), and bumps
+counters with count(). At the end of a run write_reports() saves a JSON run
+report and/or a Prometheus textfile, for example into the node_exporter
+textfile collector directory:
+
+    python main.py --metrics-json run.json --metrics-prom /var/lib/node_exporter/boarding.prom
+
+The JSON report also lists every completed page with the seconds each
+stage took since the page before it.
+
+Setting SCRAPER_METRICS_DIR writes both for every run as <scraper>.json
+and <scraper>.prom in that directory.
+
+The registry is process-wide. When several scrapers run in one process
+(scrape_all.py), combine_reports() makes the combined run the only one that
+reports, since no job's share of the registry can be told apart.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+from atomic import write_atomic
+
+METRICS_DIR = os.environ.get('SCRAPER_METRICS_DIR')
+PAGE_LOG_LIMIT = 10000  # Per-page entries kept for the JSON report
+# Reported even when zero, so their Prometheus series never disappear
+COUNTERS = ('requests', 'bytes_downloaded', 'retries', 'pages', 'rows_written')
+combined_run = None  # Name of the run reporting for every job in this process, see combine_reports()
+
+
+class Metrics:
+    """Thread-safe stage durations (count, total, max) and event counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.pages = []
+        self.page_mark = {}  # Stage totals as of the last page, see page()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            stats = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def drain(self):
+        """Take the stages and counters recorded so far, leaving them empty"""
+        with self.lock:
+            taken = self.stages, self.counters
+            self.stages, self.counters = {}, dict.fromkeys(COUNTERS, 0)
+            self.page_mark = {}
+        return taken
+
+    def merge(self, stages, counters):
+        """Add stages and counters drained in another process, e.g. a parser pool worker"""
+        with self.lock:
+            for stage, (count, total, longest) in stages.items():
+                stats = self.stages.setdefault(stage, [0, 0.0, 0.0])
+                stats[0] += count
+                stats[1] += total
+                stats[2] = max(stats[2], longest)
+            for name, amount in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def page(self, key, page, rows_so_far):
+        """Note one completed page of a crawl, the rows emitted up to it and its stage times
+
+        A page's stage times are the seconds each stage recorded since the
+        previous page completed. With pages in flight in parallel that is
+        the work done between two completions rather than one page's own.
+        """
+        self.count('pages')
+        with self.lock:
+            totals = {stage: stats[1] for stage, stats in self.stages.items()}
+            stages = {stage: round(total - self.page_mark.get(stage, 0.0), 4) for stage, total in sorted(totals.items())
+                      if total > self.page_mark.get(stage, 0.0)}
+            self.page_mark = totals
+            if len(self.pages) < PAGE_LOG_LIMIT:
+                self.pages.append({'key': key, 'page': page, 'rows_so_far': rows_so_far,
+                                   'at': round(time.time() - self.started, 3), 'stages': stages})
+
+    def report(self, scraper):
+        with self.lock:
+            duration = time.time() - self.started
+            return {
+                'scraper': scraper,
+                'started': self.started,
+                'duration_seconds': round(duration, 3),
+                'stages': {
+                    stage: {
+                        'count': count,
+                        'total_seconds': round(total, 4),
+                        'mean_seconds': round(total / count, 4) if count else 0.0,
+                        'max_seconds': round(longest, 4),
+                        'share_of_run': round(total / duration, 4) if duration else 0.0,
+                    }
+                    for stage, (count, total, longest) in sorted(self.stages.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+                'pages': list(self.pages),
+            }
+
+    def prometheus(self, scraper):
+        """The run's metrics in the Prometheus text exposition format"""
+        report = self.report(scraper)
+        label = scraper.replace('\\', '\\\\').replace('"', '\\"')
+        lines = [
+            '# HELP scraper_run_duration_seconds Wall time of the last run.',
+            '# TYPE scraper_run_duration_seconds gauge',
+            f'scraper_run_duration_seconds{{scraper="{label}"}} {report["duration_seconds"]}',
+            '# HELP scraper_run_started_timestamp_seconds Start of the last run.',
+            '# TYPE scraper_run_started_timestamp_seconds gauge',
+            f'scraper_run_started_timestamp_seconds{{scraper="{label}"}} {report["started"]:.3f}',
+            '# HELP scraper_stage_seconds_total Time spent per stage in the last run.',
+            '# TYPE scraper_stage_seconds_total counter',
+        ]
+        stages = report['stages']
+        lines += [f'scraper_stage_seconds_total{{scraper="{label}",stage="{stage}"}} {stats["total_seconds"]}'
+                  for stage, stats in stages.items()]
+        lines += ['# HELP scraper_stage_calls_total Timed calls per stage in the last run.',
+                  '# TYPE scraper_stage_calls_total counter']
+        lines += [f'scraper_stage_calls_total{{scraper="{label}",stage="{stage}"}} {stats["count"]}'
+                  for stage, stats in stages.items()]
+        lines += ['# HELP scraper_stage_max_seconds Longest single call per stage in the last run.',
+                  '# TYPE scraper_stage_max_seconds gauge']
+        lines += [f'scraper_stage_max_seconds{{scraper="{label}",stage="{stage}"}} {stats["max_seconds"]}'
+                  for stage, stats in stages.items()]
+        for name, value in report['counters'].items():
+            lines += [f'# TYPE scraper_{name}_total counter', f'scraper_{name}_total{{scraper="{label}"}} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class timed(contextlib.ContextDecorator):
+    """Time a block or function into a stage of the run's metrics"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.starts = threading.local()
+
+    def __enter__(self):
+        stack = getattr(self.starts, 'stack', None)
+        if stack is None:
+            stack = self.starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info):
+        metrics.observe(self.stage, time.perf_counter() - self.starts.stack.pop())
+        return False
+
+
+def observe(stage, seconds):
+    metrics.observe(stage, seconds)
+
+
+def count(name, amount=1):
+    metrics.count(name, amount)
+
+
+def record_page(key, page, rows_so_far):
+    metrics.page(key, page, rows_so_far)
+
+
+def add_report_args(parser):
+    """Add the --metrics-json and --metrics-prom options to a scraper's parser"""
+    parser.add_argument('--metrics-json', help="write a JSON run report with per-stage timings here")
+    parser.add_argument('--metrics-prom', help="write the run's metrics as a Prometheus textfile here")
+
+
+def combine_reports(scraper):
+    """Report every job run in this process together, under scraper
+
+    Jobs share the registry, so their own write_reports() calls and wait
+    summaries are skipped from now on.
+    """
+    global combined_run
+    combined_run = scraper
+
+
+def reports_to(scraper):
+    """Whether scraper writes its own reports, i.e. is not one job of a combined run"""
+    return combined_run is None or scraper == combined_run
+
+
+def write_reports(scraper, json_path=None, prom_path=None):
+    """Write the run report and Prometheus textfile wherever they were asked for"""
+    if not reports_to(scraper):
+        return
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        json_path = json_path or os.path.join(METRICS_DIR, f"{scraper}.json")
+        prom_path = prom_path or os.path.join(METRICS_DIR, f"{scraper}.prom")
+    if json_path:
+        write_atomic(json_path, json.dumps(metrics.report(scraper), indent=2) + '\n')
+    if prom_path:
+        write_atomic(prom_path, metrics.prometheus(scraper))
+    if json_path or prom_path:
+        print_summary(scraper)
+
+
+def print_summary(scraper):
+    """Print where the run's time went, largest stage first"""
+    report = metrics.report(scraper)
+    print(f"Run metrics ({report['duration_seconds']:.1f}s):")
+    for stage, stats in sorted(report['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+        print(f"  {stage}: {stats['count']} calls, {stats['total_seconds']:.2f}s total, {stats['max_seconds']:.2f}s max")
+    for name, value in report['counters'].items():
+        print(f"  {name}: {value}")
@@ -0,0 +1,168 @@
+"""Turn scraped price and number strings into typed columns
+
+    python normalize.py boarding_houses.csv room_annex_rentals.csv food.csv fruits.csv cbsl_*.csv
+
+Every Price column ("Rs 25,000 /month", "Rs 1,250.00", "Negotiable") gains
+Price_Amount, Price_Currency, Price_Period and Price_Missing columns, and
+CBSL value columns ('298.45', 'N/A') become floats with a <name>_Missing
+mask. Each input is written next to itself as <name>_normalized.<ext>.
+All inputs are parsed in one vectorized pass over their distinct values
+(needs pandas and pyarrow).
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from atomic import atomic_path
+
+PRICE_COLUMNS = ('Price',)
+NUMBER_COLUMNS = ('Rate_LKR', 'Rate_Percent', 'Value')
+
+PRICE_RE = re.compile(
+    r'(?P<currency>rs\.?|lkr|usd|us\$|\$)?\s*'
+    r'(?P<amount>\d[\d,]*(?:\.\d+)?)\s*'
+    r'(?P<scale>mn|million|lakhs?|k)?\b\s*'
+    r'(?:(?:/|per)\s*(?P<period>day|night|week|month|year|annum))?',
+    re.IGNORECASE,
+)
+CURRENCIES = {'rs': 'LKR', 'rs.': 'LKR', 'lkr': 'LKR', 'usd': 'USD', 'us$': 'USD', '$': 'USD'}
+SCALES = {'k': 1e3, 'lakh': 1e5, 'lakhs': 1e5, 'mn': 1e6, 'million': 1e6}
+PERIODS = {'day': 'day', 'night': 'day', 'week': 'week', 'month': 'month', 'year': 'year', 'annum': 'year'}
+CURRENCY_CODES = sorted(set(CURRENCIES.values()))
+PERIOD_NAMES = sorted(set(PERIODS.values()))
+
+
+def parse_price(text):
+    """Parse one price string into (amount, currency, period); the per-row reference"""
+    match = PRICE_RE.search(text) if isinstance(text, str) else None
+    if match is None:
+        return np.nan, None, None
+    amount = float(match['amount'].replace(',', ''))
+    if match['scale']:
+        amount *= SCALES[match['scale'].lower()]
+    currency = CURRENCIES.get((match['currency'] or '').lower())
+    period = PERIODS.get((match['period'] or '').lower())
+    return amount, currency, period
+
+
+def lookup(values, table, targets):
+    """Map lower-cased matches through table onto positions in targets (null if absent)"""
+    keys = pa.array(list(table))
+    positions = pa.array([targets.index(table[key]) for key in table], type=pa.int32())
+    return pc.take(positions, pc.index_in(pc.utf8_lower(values), value_set=keys))
+
+
+def normalize_prices(prices, prefix='Price'):
+    """Vectorized parse of a price Series into amount, currency, period and missing columns
+
+    The regex runs in Arrow's compute kernels, over the distinct strings
+    only: price history repeats the same values over and over, and the
+    parsed columns are spread back to every row with a take.
+    """
+    encoded = pa.array(prices.astype(object), type=pa.string(), from_pandas=True).dictionary_encode()
+    parts = pc.extract_regex(encoded.dictionary, '(?i)' + PRICE_RE.pattern)
+
+    # Strings without a number give a null struct; groups that did not take part come back empty
+    def group(name):
+        return pc.struct_field(parts, name)
+
+    amount = pc.cast(pc.replace_substring(group('amount'), ',', ''), pa.float64())
+    scale = pc.take(pa.array(list(SCALES.values())),
+                    pc.index_in(pc.utf8_lower(group('scale')), value_set=pa.array(list(SCALES))))
+    amount = pc.multiply(amount, pc.fill_null(scale, 1.0))
+    currency = lookup(group('currency'), CURRENCIES, CURRENCY_CODES)
+    period = lookup(group('period'), PERIODS, PERIOD_NAMES)
+
+    # Rows whose price was missing have a null index and come out null
+    def spread(values):
+        return pc.take(values, encoded.indices)
+
+    def categorical(values, categories):
+        codes = pc.fill_null(spread(values), -1).to_numpy(zero_copy_only=False)
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    amounts = spread(amount).to_numpy(zero_copy_only=False)
+    return pd.DataFrame({
+        f'{prefix}_Amount': amounts,
+        f'{prefix}_Currency': categorical(currency, CURRENCY_CODES),
+        f'{prefix}_Period': categorical(period, PERIOD_NAMES),
+        f'{prefix}_Missing': np.isnan(amounts),
+    }, index=prices.index)
+
+
+def normalize_numbers(values):
+    """Vectorized parse of scraped numbers ('1,234.5', 'N/A') into floats and a null mask"""
+    cleaned = values.astype('string').str.replace(',', '', regex=False).str.strip()
+    numbers = pd.to_numeric(cleaned, errors='coerce').astype('float64')
+    return numbers, numbers.isna()
+
+
+def normalize_frames(frames):
+    """Normalize every known price and number column of several frames in one batch
+
+    The price columns of all frames are stacked into one Series so the
+    distinct strings across every source are parsed in a single pass.
+    """
+    frames = [frame.copy() for frame in frames]
+    pieces = [(i, column) for i, frame in enumerate(frames) for column in PRICE_COLUMNS if column in frame]
+    if pieces:
+        stacked = pd.concat([frames[i][column] for i, column in pieces], keys=range(len(pieces)))
+        parsed = normalize_prices(stacked)
+        for key, (i, column) in enumerate(pieces):
+            block = parsed.xs(key, level=0)
+            block.columns = [name.replace('Price', column, 1) for name in block.columns]
+            # Dataset partitions already carry Price_Amount; it is parsed the same way
+            frames[i] = pd.concat([frames[i].drop(columns=block.columns, errors='ignore'), block], axis=1)
+
+    for frame in frames:
+        for column in NUMBER_COLUMNS:
+            if column in frame:
+                frame[column], frame[f'{column}_Missing'] = normalize_numbers(frame[column])
+    return frames
+
+
+def read_output(path):
+    """Load a scraper output (CSV, JSON Lines or Parquet) keeping values as scraped"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension == '.jsonl':
+        return pd.read_json(path, lines=True, dtype=False)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def write_output(frame, path):
+    """Write a normalized frame, publishing it atomically like the sinks do"""
+    extension = os.path.splitext(path)[1].lower()
+    with atomic_path(path) as part_path:
+        if extension == '.parquet':
+            frame.to_parquet(part_path, index=False)
+        elif extension == '.jsonl':
+            frame.to_json(part_path, orient='records', lines=True, force_ascii=False)
+        else:
+            frame.to_csv(part_path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add numeric price and value columns to scraper outputs")
+    parser.add_argument('paths', nargs='+', help="scraper output files")
+    parser.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), help="output format (default: same as input)")
+    args = parser.parse_args()
+
+    frames = normalize_frames([read_output(path) for path in args.paths])
+    for path, frame in zip(args.paths, frames):
+        stem, extension = os.path.splitext(path)
+        target = f"{stem}_normalized{'.' + args.format if args.format else extension}"
+        write_output(frame, target)
+        missing = [column for column in frame if column.endswith('_Missing')]
+        nulls = ', '.join(f"{column[:-len('_Missing')]} {int(frame[column].sum())}" for column in missing)
+        print(f"Normalized {len(frame)} rows into {target}" + (f" (unparsed: {nulls})" if nulls else ""))
+
+
+if __name__ == "__main__":
+    main()
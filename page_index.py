@@ -0,0 +1,87 @@
+import re
+
+from text_matcher import NUMBER, get_matcher
+
+DECIMAL_RE = re.compile(r'\d+\.\d+')
+
+
+def normalize_label(text):
+    """Lower-case a cell label and collapse its whitespace"""
+    return ' '.join(text.split()).lower()
+
+
+class PageIndex:
+    """One-pass index of a page's table cells and flattened text
+
+    Every <td>/<th> inside a <table> is visited exactly once. Each row keeps
+    the first decimal number found in each of its cells, and every cell label
+    maps to the (row, column) positions where it appears, in document order.
+    Extractors then answer "which number sits next to label X" with lookups
+    instead of walking the tree again for every item.
+    """
+
+    def __init__(self, soup):
+        self.text = soup.get_text()
+        self.rows = []  # Per row: the first decimal in each cell, or None
+        self.labels = {}  # Normalized cell label -> [(row, column), ...]
+        self._matches = {}
+        self._label_scans = {}
+
+        seen = set()
+        for table in soup.find_all('table'):
+            # Nested tables show up in their parent's rows too; index each row once
+            for row in table.find_all('tr'):
+                if id(row) in seen:
+                    continue
+                seen.add(id(row))
+
+                row_number = len(self.rows)
+                numbers = []
+                for column, cell in enumerate(row.find_all(['td', 'th'])):
+                    match = DECIMAL_RE.search(cell.get_text(strip=True))
+                    numbers.append(match.group() if match else None)
+                    label = normalize_label(cell.get_text())
+                    if label:
+                        self.labels.setdefault(label, []).append((row_number, column))
+                self.rows.append(numbers)
+
+    def find(self, term, word=False):
+        """Return the positions of every cell whose label contains term
+
+        With word, term only counts as a whole word, so a currency code such
+        as AUD does not match inside "Saudi".
+        """
+        term = normalize_label(term)
+        key = (term, word)
+        if key not in self._matches:
+            test = re.compile(rf'(?<!\w){re.escape(term)}(?!\w)').search if word else (lambda label: term in label)
+            positions = []
+            for label, label_positions in self.labels.items():
+                if test(label):
+                    positions.extend(label_positions)
+            self._matches[key] = sorted(positions)
+        return self._matches[key]
+
+    def match(self, labels, number=NUMBER, suffix=''):
+        """Scan the page text once for every label and its trailing number
+
+        Returns the (first, suffixed) dicts of LabelMatcher.scan_all. Results
+        are kept per label set, so repeated extractor calls for the items of
+        one list share a single scan.
+        """
+        key = (tuple(labels), number, suffix)
+        if key not in self._label_scans:
+            self._label_scans[key] = get_matcher(*key).scan_all(self.text)
+        return self._label_scans[key]
+
+    def number_at(self, row, column):
+        """Return the decimal in one cell, or None"""
+        numbers = self.rows[row]
+        return numbers[column] if 0 <= column < len(numbers) else None
+
+    def first_number(self, row):
+        """Return the first decimal anywhere in a row, or None"""
+        for value in self.rows[row]:
+            if value is not None:
+                return value
+        return None
@@ -0,0 +1,55 @@
+import threading
+
+
+class PageOrder:
+    """Hands scraped pages over in page order and tracks where a crawl stops
+
+    Pages may finish in any order on any thread. finish() holds a page back
+    until every page before it has been passed to on_page(page, rows), and
+    lowers stop_at as soon as an empty or failing page is seen, so nothing
+    after it is handed out or emitted. Returning True from on_page stops the
+    crawl after that page. failed tells whether the stop came from a
+    failing page.
+    """
+
+    def __init__(self, on_page, start_page=1, max_pages=None):
+        self.on_page = on_page
+        self.next_page = start_page  # Next page to hand to a worker
+        self.next_emit = start_page  # Next page to hand to on_page
+        self.stop_at = max_pages + 1 if max_pages is not None else float('inf')
+        self.failed = False
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def claim(self):
+        """Next page number to scrape, or None once every page before the stop is taken"""
+        with self.lock:
+            page = self.next_page
+            if page >= self.stop_at:
+                return None
+            self.next_page += 1
+            return page
+
+    def wanted(self, page):
+        return page < self.stop_at
+
+    def finish(self, page, rows):
+        """Take one scraped page: its rows, [] if it was empty or None if it failed
+
+        Returns False if the page lies past the stop and was dropped.
+        """
+        with self.lock:
+            if page >= self.stop_at:
+                return False
+            if rows:
+                self.results[page] = rows
+                while self.next_emit in self.results and self.next_emit < self.stop_at:
+                    stop = self.on_page(self.next_emit, self.results.pop(self.next_emit))
+                    self.next_emit += 1
+                    if stop:
+                        self.stop_at = self.next_emit
+                        self.failed = False
+            else:
+                self.stop_at = page
+                self.failed = rows is None
+            return True
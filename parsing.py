@@ -0,0 +1,47 @@
+import importlib.util
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import metrics
+
+# Tried in order when no parser is requested. lxml is a C parser and by far the
+# fastest; html.parser ships with Python. html5lib parses like a browser and is
+# the most lenient with broken markup, but also the slowest, so it is only used
+# when asked for (argument or SCRAPER_HTML_PARSER=html5lib).
+PARSER_PREFERENCE = ('lxml', 'html.parser')
+PARSER_MODULES = {'lxml': 'lxml', 'html5lib': 'html5lib', 'html.parser': None}
+
+# Only the fragments each scraper reads get built into a tree
+IKMAN_AD_CARDS = SoupStrainer('li', class_="normal--2QYVk gtm-normal-ad")
+
+
+def parser_available(parser):
+    """Return True if a BeautifulSoup tree builder can be used here"""
+    if parser not in PARSER_MODULES:
+        return False
+    module = PARSER_MODULES[parser]
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def default_parser():
+    """Pick the parser from SCRAPER_HTML_PARSER or the fastest one installed"""
+    requested = os.environ.get('SCRAPER_HTML_PARSER')
+    if requested:
+        if not parser_available(requested):
+            raise ValueError(f"HTML parser {requested!r} is not installed")
+        return requested
+    for parser in PARSER_PREFERENCE:
+        if parser_available(parser):
+            return parser
+    return 'html.parser'
+
+
+@metrics.timed('parse')
+def make_soup(markup, parse_only=None, parser=None):
+    """Parse markup with the configured backend, optionally only the strained fragments"""
+    parser = parser or default_parser()
+    if parser == 'html5lib':
+        # html5lib always builds the full tree and warns if asked to strain
+        parse_only = None
+    return BeautifulSoup(markup, parser, parse_only=parse_only)
@@ -1,117 +1,150 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+
+import metrics
+from browser import chromedriver_path, new_browser
+from checkpoint import open_checkpointed_sink
+from extract_spec import CardSpec
+from page_order import PageOrder
+from seen_index import IncrementalRun
+from sinks import FORMATS, source_name
+from waits import any_of, elements_present, network_idle, print_wait_summary, wait_for
 
 # List of URLs to scrape
 urls = [
     "https://ikman.lk/en/ads/sri-lanka/room-annex-rentals"
 ]
 
-data = []
+MAX_PAGES = 100  # Set high limit to ensure we get all pages
+WORKERS = 4  # Headless Chrome processes crawling pages in parallel
+OUTPUT_FILE = 'room_annex_rentals.csv'
+
+# Listing cards, in the order the scraper tries them
+CARD_LOCATORS = [
+    (By.CSS_SELECTOR, "li[class*='normal']"),
+    (By.CSS_SELECTOR, "a[href*='/ad/']"),
+    (By.XPATH, "//ul[@class='list--3NxGO']/li"),
+]
+
+# Card fields with their fallback selectors, tried in order
+CARD_SPEC = CardSpec(CARD_LOCATORS, {
+    'Name': {'selectors': ['h2', "[class*='title']"]},
+    'Price': {'selectors': ["div[class*='price']", "[class*='price']"], 'default': "N/A"},
+    'Image_URL': {'selectors': ['img'], 'attrs': ['src', 'data-src'], 'default': "N/A"},
+})
+
 
-# Set up Selenium WebDriver with headless option
-options = webdriver.ChromeOptions()
-options.add_argument('--headless')
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+def wait_for_cards(driver, label):
+    """Wait until listing cards render, or the page settles without any"""
+    wait_for(driver, any_of(*(elements_present(locator) for locator in CARD_LOCATORS), network_idle(1.0)), 10, label)
 
-for base_url in urls:
-    driver.get(base_url)
-    time.sleep(5)
+
+def scrape_page(driver, base_url, page):
+    """Load one results page and return its listing rows"""
     category = base_url.split('/')[-1]
-    page = 1
-    total_pages = 100  # Set high limit to ensure we get all pages
-    
-    while page <= total_pages:
-        print(f"Scraping page {page} of {category}")
-        
-        # Navigate to the current page
-        if page > 1:
-            current_url = f"{base_url}?page={page}"
-            driver.get(current_url)
-            time.sleep(3)
-        
-        # Try to find items
-        collections = []
-        product_divs = driver.find_elements(By.CSS_SELECTOR, "li[class*='normal']")
-        if product_divs:
-            collections = product_divs
-        else:
-            # Try alternative selector
-            col_divs = driver.find_elements(By.CSS_SELECTOR, "a[href*='/ad/']")
-            if col_divs:
-                collections = col_divs
-            else:
-                # Try another alternative
-                ban_divs = driver.find_elements(By.XPATH, "//ul[@class='list--3NxGO']/li")
-                collections = ban_divs
-        
-        if not collections:
-            print(f"No products found on page {page}, stopping.")
-            break
-        
-        for col in collections:
-            name = "N/A"
-            price = "N/A"
-            image_url = "N/A"
-            try:
-                # Extract name - try multiple selectors
-                try:
-                    name_elem = col.find_element(By.TAG_NAME, "h2")
-                    name = name_elem.text.strip()
-                except:
-                    try:
-                        name_elem = col.find_element(By.CSS_SELECTOR, "[class*='title']")
-                        name = name_elem.text.strip()
-                    except:
-                        pass
-                
-                # Extract price - try multiple selectors
-                try:
-                    price_elem = col.find_element(By.XPATH, ".//div[contains(@class, 'price')]")
-                    price = price_elem.text.strip()
-                except:
-                    try:
-                        price_elem = col.find_element(By.CSS_SELECTOR, "[class*='price']")
-                        price = price_elem.text.strip()
-                    except:
-                        pass
-                
-                # Extract image URL
+    print(f"Scraping page {page} of {category}")
+
+    # Navigate to the current page
+    driver.get(base_url if page == 1 else f"{base_url}?page={page}")
+    wait_for_cards(driver, f"page {page}")
+
+    # Read every card's name, price and image in one script call
+    rows = []
+    for card in CARD_SPEC.extract_page(driver):
+        # Only add if we got at least a name
+        if card['Name'] is not None:
+            rows.append({'Category': category, **card})
+    return rows
+
+
+def crawl(base_url, on_page, max_pages=MAX_PAGES, workers=WORKERS, start_page=1):
+    """Shard result pages across a pool of Chrome workers and emit them in page order
+
+    Workers take the next page number from a shared counter. Once any worker
+    sees an empty (or failing) page, no page after it is handed out; pages
+    already in flight past that point are discarded. on_page(page, rows) is
+    called for each page as soon as every page before it is done; returning
+    True from it ends the crawl after that page. Returns False if a failing
+    page stopped the crawl before its end.
+    """
+    order = PageOrder(on_page, start_page, max_pages)
+
+    def worker():
+        driver = new_browser()
+        try:
+            while True:
+                page = order.claim()
+                if page is None:
+                    return
+
                 try:
-                    img_elem = col.find_element(By.TAG_NAME, "img")
-                    image_url = img_elem.get_attribute('src') or img_elem.get_attribute('data-src')
-                except:
-                    pass
-            except Exception as e:
+                    rows = scrape_page(driver, base_url, page)
+                except Exception as e:
+                    print(f"Error scraping page {page}: {e}")
+                    rows = None
+
+                if order.finish(page, rows) and rows == []:
+                    print(f"No products found on page {page}, stopping.")
+        finally:
+            driver.quit()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(worker) for _ in range(workers)]:
+            future.result()
+    return not order.failed
+
+
+def main(argv=None):
+    """Crawl the room/annex rental listings and save them to CSV"""
+    parser = argparse.ArgumentParser(description="Scrape ikman.lk room and annex rentals")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="parallel Chrome processes")
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: from --output)")
+    parser.add_argument('--resume', action='store_true', help="continue the last interrupted run from its checkpoint")
+    parser.add_argument('--incremental', action='store_true',
+                        help="write only new or changed ads and stop at the first page with no new ones")
+    parser.add_argument('--index', help="seen-ads index for --incremental (default: next to --output)")
+    metrics.add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    # Resolve chromedriver once up front instead of racing in every worker
+    chromedriver_path()
+
+    sink, checkpoint = open_checkpointed_sink(args.output, args.format, args.resume)
+    complete = True
+    with IncrementalRun(args.output, args.incremental, args.index, args.resume) as seen, sink:
+        for base_url in urls:
+            if base_url in checkpoint.finished:
                 continue
-            
-            # Only add if we got at least a name
-            if name != "N/A":
-                data.append({
-                    'Category': category,
-                    'Name': name,
-                    'Price': price,
-                    'Image_URL': image_url
-                })
-        
-        print(f"Collected {len(data)} items so far...")
-        
-        # Move to next page
-        page += 1
-
-driver.quit()
-
-# Save to CSV
-if data:
-    df = pd.DataFrame(data)
-    df.to_csv('room_annex_rentals.csv', index=False)
-    print(f"Scraped {len(data)} items and saved to room_annex_rentals.csv")
-else:
-    print("No data scraped.")
+
+            def on_page(page, rows):
+                rows, known = seen.check_page(rows)
+                sink.write_many(checkpoint.new_rows(rows))
+                checkpoint.page_done(page, sink, base_url)
+                print(f"Collected {sink.rows_received} items so far...")
+                if known:
+                    # Category listings are newest first, so nothing past this page is new
+                    print(f"Page {page} holds only known ads, stopping.")
+                return known
+
+            if crawl(base_url, on_page, args.max_pages, args.workers, checkpoint.last_page(base_url) + 1):
+                checkpoint.finish(base_url)
+            else:
+                complete = False
+        seen.finish(sink, checkpoint, complete)
+
+    print_wait_summary()
+
+    if complete and sink.rows_written:
+        print(f"Scraped {sink.rows_written} items and saved to {sink.path}")
+    elif complete:
+        print("No data scraped.")
+    metrics.write_reports(source_name(args.output), args.metrics_json, args.metrics_prom)
+    return complete
+
+
+if __name__ == "__main__":
+    main()
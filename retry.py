@@ -0,0 +1,174 @@
+"""Retries with jittered exponential backoff, a per-run budget and per-host circuit breakers
+
+A RetryPolicy runs one attempt at a time through call(). A failed attempt
+is retried only if it was transient: a connection error, a timeout or a
+429/5xx response, as decided by the caller's classifier. Waits between
+attempts grow exponentially with full jitter (and honour Retry-After);
+every retry spends from a run-wide budget of a fraction of all requests,
+so a site-wide outage cannot multiply the run's traffic. After
+BREAKER_THRESHOLD consecutive failures a host's circuit opens and calls
+to it fail fast with CircuitOpenError until BREAKER_COOLDOWN has passed;
+then one trial call is let through and its outcome closes or re-opens it.
+"""
+import random
+import threading
+import time
+
+import requests
+
+import metrics
+
+ATTEMPTS = 4  # Tries per call, the first one included
+BASE_DELAY = 0.5  # Seconds; attempt n waits up to BASE_DELAY * 2**n
+MAX_DELAY = 30.0
+RETRY_RATIO = 0.1  # Retries allowed per request made so far
+MIN_RETRIES = 10  # Retries always allowed, however few requests were made
+BREAKER_THRESHOLD = 5  # Consecutive failures that open a host's circuit
+BREAKER_COOLDOWN = 30.0  # Seconds a circuit stays open before a trial call
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open"""
+
+
+def http_retryable(error):
+    """Transient transport errors; anything else (bad URL, TLS, decoding) is fatal"""
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def retryable_response(response):
+    return response.status_code in RETRYABLE_STATUSES
+
+
+def retry_after(response):
+    """Seconds the server asked us to wait, if it said so in Retry-After"""
+    value = getattr(response, 'headers', {}).get('Retry-After', '')
+    return float(value) if value.strip().isdigit() else None
+
+
+class RetryBudget:
+    """Caps retries at a fraction of the requests made in the run"""
+
+    def __init__(self, ratio=RETRY_RATIO, minimum=MIN_RETRIES):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def spend(self):
+        """Take one retry from the budget; False once it is used up"""
+        with self.lock:
+            if self.retries >= self.minimum + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+class CircuitBreaker:
+    """Closed, open or half-open state of one host"""
+
+    def __init__(self, host, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if self.trial or time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(f"{self.host} failed {self.failures} times in a row; not calling it for now")
+            self.trial = True  # Half-open: this call decides
+
+    def release(self):
+        """End a trial call that neither succeeded nor failed transiently"""
+        with self.lock:
+            self.trial = False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial:
+                    print(f"Circuit for {self.host} open after {self.failures} consecutive failures")
+                    metrics.count('circuit_opens')
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+
+class RetryPolicy:
+    """Runs calls with retries, a shared budget and one circuit breaker per host"""
+
+    def __init__(self, attempts=ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY, budget=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, host):
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(host)
+            return self.breakers[host]
+
+    def backoff(self, attempt, hint=None):
+        """Full-jitter exponential delay before retry number attempt + 1"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return min(self.max_delay, max(delay, hint or 0))
+
+    def call(self, host, attempt, retryable=http_retryable, retry_result=None):
+        """Run attempt() until it succeeds, fails fatally or runs out of retries
+
+        retryable(error) says whether an exception is transient;
+        retry_result(result) whether a returned value (say a 503 response)
+        should be retried. When the retries run out the last error is
+        raised, or the last such value returned for the caller to handle.
+        """
+        breaker = self.breaker(host)
+        for number in range(self.attempts):
+            breaker.check()
+            self.budget.record_request()
+            hint = None
+            try:
+                result = attempt()
+            except Exception as e:
+                if not retryable(e):
+                    breaker.release()
+                    raise
+                breaker.failure()
+                if number + 1 == self.attempts or not self.budget.spend():
+                    raise
+                print(f"Retrying {host} after {type(e).__name__}: {e}")
+            else:
+                if retry_result is None or not retry_result(result):
+                    breaker.success()
+                    return result
+                breaker.failure()
+                if number + 1 == self.attempts or not self.budget.spend():
+                    return result
+                hint = retry_after(result)
+                print(f"Retrying {host} after HTTP {getattr(result, 'status_code', result)}")
+            metrics.count('retries')
+            time.sleep(self.backoff(number, hint))
+
+
+default_policy = RetryPolicy()
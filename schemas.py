@@ -0,0 +1,154 @@
+import datetime
+import math
+
+# Column types per output, keyed by source name (the output file name without
+# extension). 'category' columns are dictionary encoded; sources without an
+# entry (foods, whose columns come from the page) get an inferred schema.
+# Listing prices stay as scraped ("Rs 25,000 /month", "Negotiable") next to
+# their parsed Price_Amount, which is filled in from Price (see DERIVED).
+SCHEMAS = {
+    'boarding_houses': {
+        'Title': 'string',
+        'Price': 'string',
+        'Price_Amount': 'float',
+        'Description': 'string',
+        'Details': 'string',
+    },
+    'room_annex_rentals': {
+        'Category': 'category',
+        'Name': 'string',
+        'Price': 'string',
+        'Price_Amount': 'float',
+        'Image_URL': 'string',
+    },
+    'food': {
+        'Category': 'category',
+        'Name': 'string',
+        'Price': 'string',
+        'Price_Amount': 'float',
+        'Image_URL': 'string',
+    },
+    'fruits': {
+        'Category': 'category',
+        'Name': 'string',
+        'Price': 'string',
+        'Price_Amount': 'float',
+        'Image_URL': 'string',
+    },
+    'cbsl_exchange_rates': {
+        'Currency': 'category',
+        'Rate_LKR': 'float',
+        'Date': 'date',
+        'Time': 'string',
+        'Source': 'category',
+    },
+    'cbsl_inflation_data': {
+        'Inflation_Type': 'category',
+        'Rate_Percent': 'float',
+        'Date': 'date',
+        'Period': 'category',
+        'Source': 'category',
+    },
+    'cbsl_interest_rates': {
+        'Rate_Type': 'category',
+        'Rate_Percent': 'float',
+        'Date': 'date',
+        'Effective_Date': 'category',
+        'Source': 'category',
+    },
+    'cbsl_economic_indicators': {
+        'Indicator': 'category',
+        'Value': 'float',
+        'Unit': 'category',
+        'Date': 'date',
+        'Period': 'category',
+        'Source': 'category',
+    },
+    'cbsl_economic_summary': {
+        'Category': 'category',
+        'Item': 'category',
+        'Value': 'float',
+        'Unit': 'category',
+        'Date': 'date',
+        'Source': 'category',
+    },
+}
+
+
+# Columns computed from a scraped column rather than scraped themselves
+DERIVED = {'Price_Amount': 'Price'}
+
+
+def arrow_type(name):
+    import pyarrow as pa
+
+    return {
+        'string': pa.string(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'float': pa.float64(),
+        'date': pa.date32(),
+    }[name]
+
+
+def schema_for(source):
+    """Arrow schema for a source, or None to infer one from the first batch"""
+    import pyarrow as pa
+
+    columns = SCHEMAS.get(source)
+    if columns is None:
+        return None
+    return pa.schema([(name, arrow_type(kind)) for name, kind in columns.items()])
+
+
+def to_float(value):
+    """Parse a scraped number such as '1,250.00'; anything else becomes null"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '').strip())
+    except ValueError:
+        return None
+
+
+def to_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def to_string(value):
+    return str(value)
+
+
+def coerce_column(values, arrow_type):
+    """Convert scraped values to what a column of arrow_type expects"""
+    import pyarrow as pa
+
+    if pa.types.is_floating(arrow_type):
+        convert = to_float
+    elif pa.types.is_date(arrow_type):
+        convert = to_date
+    else:
+        convert = to_string
+    return [None if value is None else convert(value) for value in values]
+
+
+def price_amounts(prices):
+    """Amounts of scraped price strings, None where there is no number (needs pandas)"""
+    import pandas as pd
+
+    from normalize import normalize_prices
+
+    amounts = normalize_prices(pd.Series(prices, dtype=object))['Price_Amount']
+    return [None if math.isnan(amount) else float(amount) for amount in amounts]
+
+
+def derive_columns(columns):
+    """Fill the DERIVED columns of a batch (column name -> values) from their sources"""
+    for name, source in DERIVED.items():
+        if name in columns and source in columns:
+            columns[name] = price_amounts(columns[source])
+    return columns
@@ -0,0 +1,170 @@
+"""Run every scraper from one process under a shared worker budget
+
+    python scrape_all.py                                # every job
+    python scrape_all.py boarding cbsl                  # only these jobs
+    python scrape_all.py --workers 4 --site-limit cargills=1 --browsers 3 --resume
+
+Jobs run as threads of this process, so they share one HTTP pool and its
+per-host rate limits (http_client.default_client()). --workers caps how
+many jobs run at once and the site limits cap how many run against one
+site, so the two ikman crawls and the two Cargills categories never pile
+onto their site together. With --browsers N the Selenium jobs lease Chrome
+from one warm pool of N processes instead of each launching its own.
+Jobs are started slowest first, so the run takes about as long as its
+slowest job rather than the sum of all of them.
+
+The run metrics (--metrics-json/--metrics-prom, or scrape_all.json/.prom
+under SCRAPER_METRICS_DIR) cover every job together; the jobs write no
+reports or wait summaries of their own, since they share one registry.
+"""
+import argparse
+import importlib
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import browser
+import metrics
+from sinks import FORMATS
+from waits import print_wait_summary
+
+# Slowest first: the Selenium crawls dominate a nightly run
+JOBS = {
+    'rentals': {'module': 'property', 'site': 'ikman', 'resumable': True},
+    'foods': {'module': 'foods', 'site': 'foodcompositiondb', 'resumable': True},
+    'boarding': {'module': 'main', 'site': 'ikman', 'resumable': True},
+    'food': {'module': 'food', 'site': 'cargills', 'resumable': True},
+    'fruits': {'module': 'fruits', 'site': 'cargills', 'resumable': True},
+    'cbsl': {'module': 'economic', 'site': 'cbsl', 'resumable': False},
+}
+# Jobs allowed to run against one site at the same time
+SITE_LIMITS = {'ikman': 2, 'cargills': 2}
+DEFAULT_SITE_LIMIT = 1
+WORKERS = 4
+
+
+def job_argv(name, args):
+    """Command line passed to a job's main()"""
+    argv = []
+    if args.format:
+        argv += ['--format', args.format]
+    if args.resume and JOBS[name]['resumable']:
+        argv.append('--resume')
+    return argv
+
+
+def run_jobs(names, workers=WORKERS, site_limits=None, argv_for=lambda name: []):
+    """Run the named jobs concurrently and return {name: (status, seconds)}
+
+    A job starts as soon as a worker is free and its site is under its
+    limit. Status is 'ok', 'incomplete' when the job's main() returned
+    False (a crawl that stopped early), or 'crashed'.
+    """
+    limits = dict(SITE_LIMITS if site_limits is None else site_limits)
+    entry_points = {name: importlib.import_module(JOBS[name]['module']).main for name in names}
+    pending = list(names)
+    running = {}
+    results = {}
+    changed = threading.Condition()
+
+    def site_busy(name):
+        site = JOBS[name]['site']
+        active = sum(1 for other in running if JOBS[other]['site'] == site)
+        return active >= limits.get(site, DEFAULT_SITE_LIMIT)
+
+    def run(name):
+        start = time.monotonic()
+        try:
+            status = 'incomplete' if entry_points[name](argv_for(name)) is False else 'ok'
+        except BaseException as e:  # argparse exits with SystemExit
+            print(f"Job {name} crashed: {e!r}")
+            status = 'crashed'
+        elapsed = time.monotonic() - start
+        print(f"Job {name} finished in {elapsed:.1f}s ({status})")
+        with changed:
+            results[name] = (status, elapsed)
+            del running[name]
+            changed.notify_all()
+
+    with changed:
+        while pending or running:
+            ready = None
+            if len(running) < workers:
+                ready = next((name for name in pending if not site_busy(name)), None)
+            if ready is None:
+                changed.wait()
+                continue
+            pending.remove(ready)
+            print(f"Starting job {ready} ({JOBS[ready]['site']})")
+            running[ready] = threading.Thread(target=run, args=(ready,), name=f"job-{ready}", daemon=True)
+            running[ready].start()
+    return results
+
+
+def start_browser_pool(size, base_port):
+    """Start a warm Chrome pool in this process and point every Browser at it"""
+    from browser_service import BrowserService, make_handler
+
+    service = BrowserService(size, base_port, browser.RECYCLE_AFTER)
+    service.start()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    browser.use_service(f"http://127.0.0.1:{server.server_address[1]}")
+    print(f"Sharing {size} warm Chrome processes between jobs")
+    return service, server
+
+
+def parse_site_limit(text):
+    site, _, limit = text.partition('=')
+    if not site or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(f"expected SITE=N, got {text!r}")
+    return site, int(limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scrapers concurrently from one process")
+    parser.add_argument('jobs', nargs='*', metavar='JOB', help=f"jobs to run (default: all of {', '.join(JOBS)})")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="jobs running at once")
+    parser.add_argument('--site-limit', type=parse_site_limit, action='append', default=[], metavar='SITE=N',
+                        help="jobs allowed on one site at once (repeatable, e.g. ikman=1)")
+    parser.add_argument('--browsers', type=int, default=0,
+                        help="warm Chrome processes shared by the Selenium jobs (0 = each job starts its own)")
+    parser.add_argument('--browser-base-port', type=int, default=9222, help="first remote-debugging port for --browsers")
+    parser.add_argument('--format', choices=FORMATS, help="output format for every job")
+    parser.add_argument('--resume', action='store_true', help="resume every job that left a checkpoint")
+    metrics.add_report_args(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.jobs if name not in JOBS]
+    if unknown:
+        parser.error(f"unknown jobs: {', '.join(unknown)}")
+
+    names = [name for name in JOBS if name in args.jobs] if args.jobs else list(JOBS)
+    metrics.combine_reports('scrape_all')
+    pool = start_browser_pool(args.browsers, args.browser_base_port) if args.browsers else None
+    start = time.monotonic()
+    try:
+        results = run_jobs(names, args.workers, {**SITE_LIMITS, **dict(args.site_limit)},
+                           lambda name: job_argv(name, args))
+    finally:
+        if pool:
+            service, server = pool
+            server.shutdown()
+            service.stop()
+            browser.use_service(None)
+
+    wall_time = time.monotonic() - start
+    print(f"\n{'job':<10} {'status':<11} {'seconds':>8}")
+    for name in names:
+        status, elapsed = results[name]
+        print(f"{name:<10} {status:<11} {elapsed:>8.1f}")
+    print(f"Wall time {wall_time:.1f}s for {sum(elapsed for _, elapsed in results.values()):.1f}s of jobs")
+    print_wait_summary('scrape_all')
+    metrics.write_reports('scrape_all', args.metrics_json, args.metrics_prom)
+
+    if any(status != 'ok' for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from checkpoint import finish_run
+
+# Fields that identify an ad when it has no URL of its own
+IDENTITY_FIELDS = ('URL', 'Title', 'Name', 'Price', 'Details')
+
+
+def index_path(output_path):
+    """Seen-ads index kept next to a crawl's output"""
+    return os.path.splitext(output_path)[0] + '.seen.sqlite'
+
+
+def digest(value):
+    text = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def ad_key(row):
+    """Stable identity of an ad: its URL, or a hash of title, price and details"""
+    if row.get('URL'):
+        return row['URL']
+    return digest([row.get(field) for field in IDENTITY_FIELDS])
+
+
+class SeenIndex:
+    """Persistent SQLite index of the ads earlier runs have written
+
+    Each ad is stored under ad_key() with a fingerprint of the whole row, so
+    a later run can tell new and changed ads from ones it already has.
+    Ads seen by the current run are staged in a separate table page by page
+    and only merged into the index by commit(), once the run's output has
+    been published; a failed run therefore never marks ads as known that
+    never reached an output file, and a resumed run keeps what it staged.
+
+    Crawl workers check their pages from their own threads, so the one
+    connection is shared between threads and used under a lock.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS ads (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pending (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL
+            );
+        """)
+        if not resume:
+            self.db.execute("DELETE FROM pending")
+        self.db.commit()
+
+    def known(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM ads").fetchone()[0]
+
+    def check_page(self, rows):
+        """Split a page into (new or changed rows, whether every ad was already known)
+
+        The ads on the page are staged for commit().
+        """
+        keyed = [(ad_key(row), digest(row), row) for row in rows]
+        keys = [key for key, _, _ in keyed]
+        stored = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                stored.update(self.db.execute(
+                    f"SELECT key, fingerprint FROM ads WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO pending (key, fingerprint) VALUES (?, ?)",
+                                    [(key, fingerprint) for key, fingerprint, _ in keyed])
+
+        fresh = [row for key, fingerprint, row in keyed if stored.get(key) != fingerprint]
+        return fresh, all(key in stored for key in keys)
+
+    def commit(self):
+        """Merge the ads staged by this run into the index"""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("""
+                INSERT INTO ads (key, fingerprint, first_seen, last_seen)
+                SELECT key, fingerprint, ?, ? FROM pending WHERE true
+                ON CONFLICT (key) DO UPDATE SET fingerprint = excluded.fingerprint, last_seen = excluded.last_seen
+            """, (now, now))
+            self.db.execute("DELETE FROM pending")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class IncrementalRun:
+    """The seen-ads side of a crawl that writes only new or changed ads
+
+    Without incremental every page passes through unchanged and finish()
+    is plain finish_run(). With it, pages are checked against the seen-ads
+    index, an empty run removes the previous output instead of leaving it
+    to look current, and the ads staged by the run are committed to the
+    index only once the output holding them is published. Use it as a
+    context manager so the index is closed however the crawl ends.
+    """
+
+    def __init__(self, output, incremental=False, path=None, resume=False):
+        self.index = None
+        if incremental:
+            self.index = SeenIndex(path or index_path(output), resume)
+            print(f"Seen-ads index {self.index.path} knows {self.index.known()} ads")
+
+    def check_page(self, rows):
+        """(rows to write, whether every ad on the page was already known)"""
+        if self.index is None:
+            return rows, False
+        return self.index.check_page(rows)
+
+    def finish(self, sink, checkpoint, complete):
+        """Publish the run's output through finish_run, then commit what it holds"""
+        finish_run(sink, checkpoint, complete, replace=self.index is not None)
+        if self.index is not None and complete:
+            self.index.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.index is not None:
+            self.index.close()
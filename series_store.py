@@ -0,0 +1,167 @@
+"""Append-only store of daily economic series, e.g. Exchange Rate:USD/LKR
+
+Each series is one binary file of (date, value) records sorted by date,
+with one record per day, plus an entry in catalog.json. Reads map the file
+with NumPy and binary-search the date column, so latest and range queries
+never load or scan a whole history. The store assumes a single writer.
+
+    python series_store.py --latest
+    python series_store.py "Exchange Rate:USD/LKR" "Interest Rate:Repo Rate" --start 2026-01-01
+"""
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+
+from atomic import atomic_path, write_atomic
+from schemas import to_date, to_float
+
+STORE_DIR = os.environ.get('SCRAPER_SERIES_STORE', 'cbsl_series')
+RECORD = np.dtype([('day', '<i4'), ('value', '<f8')])  # day = days since 1970-01-01
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def series_key(category, item):
+    return f"{category}:{item}"
+
+
+def to_day(value):
+    """Days since the epoch for a date or 'YYYY-MM-DD' string"""
+    return int((np.datetime64(to_date(value), 'D') - EPOCH).astype(int))
+
+
+class SeriesStore:
+    """Daily series keyed by (category, item), appended to and read without rewrites"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.catalog_path = os.path.join(root, 'catalog.json')
+        try:
+            with open(self.catalog_path, encoding='utf-8') as f:
+                self.catalog = json.load(f)
+        except FileNotFoundError:
+            self.catalog = {}
+
+    def keys(self, category=None):
+        return sorted(key for key, entry in self.catalog.items() if category in (None, entry['category']))
+
+    def path(self, key):
+        return os.path.join(self.root, f"{self.catalog[key]['id']}.bin")
+
+    def save_catalog(self):
+        write_atomic(self.catalog_path, json.dumps(self.catalog, indent=1, sort_keys=True))
+
+    def append(self, category, item, date, value, unit=None):
+        """Record value for date; a same-day re-scrape replaces that day's value
+
+        Values that do not parse as numbers ('N/A') are skipped, so a failed
+        scrape never overwrites a good reading. Returns True if stored.
+        """
+        value = to_float(value)
+        if value is None or to_date(date) is None:
+            return False
+        day = to_day(date)
+        key = series_key(category, item)
+
+        with self.lock:
+            if key not in self.catalog:
+                self.catalog[key] = {'id': len(self.catalog), 'category': category, 'item': item, 'unit': unit}
+                self.save_catalog()
+            record = np.array([(day, value)], dtype=RECORD).tobytes()
+            path = self.path(key)
+            records = self.records(key)
+            last_day = int(records['day'][-1]) if len(records) else None
+            del records
+
+            if last_day is None or day > last_day:
+                # The usual case: today's reading goes on the end
+                with open(path, 'ab') as f:
+                    f.write(record)
+            elif day == last_day:
+                with open(path, 'r+b') as f:
+                    f.seek(-RECORD.itemsize, os.SEEK_END)
+                    f.write(record)
+            else:
+                self.backfill(path, day, value)
+        return True
+
+    def backfill(self, path, day, value):
+        """Insert or replace a record for an earlier day, keeping the file sorted"""
+        records = np.fromfile(path, dtype=RECORD)
+        position = np.searchsorted(records['day'], day)
+        if position < len(records) and records['day'][position] == day:
+            records['value'][position] = value
+        else:
+            records = np.insert(records, position, np.array((day, value), dtype=RECORD))
+        with atomic_path(path) as temp_path:
+            records.tofile(temp_path)
+
+    def append_rows(self, rows):
+        """Append summary rows (Category, Item, Value, Unit, Date); returns how many were stored"""
+        return sum(self.append(row['Category'], row['Item'], row['Date'], row['Value'], row.get('Unit'))
+                   for row in rows)
+
+    def records(self, key):
+        """Memory-mapped (day, value) records of a series, sorted by day"""
+        path = self.path(key)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(path, dtype=RECORD, mode='r')
+
+    def read(self, key, start=None, end=None):
+        """(dates, values) of a series between start and end inclusive, as array views"""
+        records = self.records(key)
+        days = records['day']
+        low = np.searchsorted(days, to_day(start), 'left') if start is not None else 0
+        high = np.searchsorted(days, to_day(end), 'right') if end is not None else len(days)
+        window = records[low:high]
+        return EPOCH + window['day'].astype('timedelta64[D]'), window['value']
+
+    def latest(self, key):
+        """(date, value) of the most recent reading, or None"""
+        records = self.records(key)
+        if not len(records):
+            return None
+        return EPOCH + np.timedelta64(int(records['day'][-1]), 'D'), float(records['value'][-1])
+
+    def frame(self, keys=None, start=None, end=None):
+        """Series aligned on one date index, one column per key (NaN where a series has no reading)"""
+        import pandas as pd
+
+        columns = {}
+        for key in keys or self.keys():
+            dates, values = self.read(key, start, end)
+            columns[key] = pd.Series(np.asarray(values), index=pd.DatetimeIndex(dates, name='Date'))
+        return pd.DataFrame(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the CBSL series store")
+    parser.add_argument('keys', nargs='*', help="series such as 'Exchange Rate:USD/LKR' (default: all)")
+    parser.add_argument('--root', default=STORE_DIR)
+    parser.add_argument('--start', help="first date, YYYY-MM-DD")
+    parser.add_argument('--end', help="last date, YYYY-MM-DD")
+    parser.add_argument('--latest', action='store_true', help="print the latest reading of each series")
+    args = parser.parse_args()
+
+    store = SeriesStore(args.root)
+    keys = args.keys or store.keys()
+    unknown = [key for key in keys if key not in store.catalog]
+    if unknown:
+        parser.error(f"unknown series: {', '.join(unknown)}")
+
+    if args.latest:
+        for key in keys:
+            reading = store.latest(key)
+            if reading:
+                print(f"{key}: {reading[1]:g} {store.catalog[key]['unit'] or ''} on {reading[0]}")
+    else:
+        print(store.frame(keys, args.start, args.end).to_string())
+
+
+if __name__ == "__main__":
+    main()
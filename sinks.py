@@ -0,0 +1,297 @@
+import csv
+import datetime
+import itertools
+import json
+import os
+
+import metrics
+from atomic import atomic_path
+from schemas import coerce_column, derive_columns, schema_for
+
+BATCH_SIZE = 500  # Rows buffered in memory before a flush
+FORMATS = ('csv', 'jsonl', 'parquet', 'dataset')
+# Root of the partitioned Parquet dataset written by --format dataset
+DATASET_ROOT = os.environ.get('SCRAPER_DATASET_ROOT', 'datasets')
+PARQUET_COMPRESSION = 'zstd'
+
+
+def column_names(rows):
+    """Keys of rows in first-seen order"""
+    names = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    return list(names)
+
+
+class RowSink:
+    """Buffered row writer that publishes its output file atomically
+
+    Rows go to "<path>.part" in batches of batch_size. close() flushes the
+    last batch and renames the part file over path, so readers never see a
+    half-written file. If the crawl fails, the rows already flushed stay in
+    the part file instead of being lost.
+
+    Passing resume (a dict from state()) continues an earlier part file: it
+    is truncated back to the recorded offset and appended to.
+    """
+
+    resumable = True
+
+    def __init__(self, path, batch_size=BATCH_SIZE, resume=None):
+        self.path = path
+        self.part_path = path + '.part'
+        self.batch_size = batch_size
+        self.buffer = []
+        self.rows_received = 0
+        self.rows_written = 0
+        self.file = None
+        self.closed = False
+        self.resume_state = None
+        if resume and resume['offset']:
+            self.resume_from(resume)
+
+    def resume_from(self, state):
+        if not self.resumable:
+            raise ValueError(f"{type(self).__name__} output cannot be resumed")
+        os.truncate(self.part_path, state['offset'])
+        self.rows_received = self.rows_written = state['rows']
+        self.resume_state = state
+
+    def write(self, row):
+        self.buffer.append(row)
+        self.rows_received += 1
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.file is None:
+            if self.resume_state:
+                self.reopen(self.resume_state)
+            else:
+                self.open()
+        with metrics.timed('write'):
+            self.write_batch(self.buffer)
+        self.rows_written += len(self.buffer)
+        metrics.count('rows_written', len(self.buffer))
+        self.buffer = []
+
+    def state(self):
+        """Row count and part file size as of the last flush"""
+        offset = os.fstat(self.file.fileno()).st_size if self.file is not None else 0
+        if self.file is None and self.resume_state:
+            offset = self.resume_state['offset']
+        return {'part_path': self.part_path, 'rows': self.rows_written, 'offset': offset}
+
+    def close(self, replace=False):
+        """Flush, then publish the output if any rows were written
+
+        With replace, a run that wrote nothing removes the previous output
+        instead of leaving it in place, for outputs that only hold one run's
+        rows (incremental deltas).
+        """
+        if self.closed:
+            return self.rows_written
+        self.closed = True
+        self.flush()
+        self.close_file()
+        if self.rows_written:
+            os.replace(self.part_path, self.path)
+        elif replace and os.path.exists(self.path):
+            os.remove(self.path)
+            print(f"Removed {self.path} from the previous run; this run found nothing new")
+        return self.rows_written
+
+    def abort(self):
+        """Flush what we have but keep it in the part file"""
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.close_file()
+        if self.rows_written:
+            print(f"Kept {self.rows_written} rows written so far in {self.part_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # Format-specific hooks
+    def open(self):
+        raise NotImplementedError
+
+    def reopen(self, state):
+        raise NotImplementedError
+
+    def write_batch(self, rows):
+        raise NotImplementedError
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class CsvSink(RowSink):
+    """CSV output; the header comes from the columns of the first batch
+
+    Columns that first appear in a later batch widen the header: the part
+    file is rewritten once with the new columns (empty in earlier rows),
+    so no value is dropped.
+    """
+
+    def open(self):
+        self.file = open(self.part_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=column_names(self.buffer), lineterminator='\n')
+        self.writer.writeheader()
+
+    def resume_from(self, state):
+        with open(self.part_path, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), None)
+        if header != state['fieldnames']:
+            # The header was widened after the checkpoint was saved, which
+            # moved every offset; keep the checkpointed rows under the new header
+            self.rewrite(header, limit=state['rows'])
+            state = {**state, 'fieldnames': header, 'offset': os.path.getsize(self.part_path)}
+        super().resume_from(state)
+
+    def reopen(self, state):
+        self.file = open(self.part_path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=state['fieldnames'], lineterminator='\n')
+
+    def state(self):
+        state = super().state()
+        if self.file is not None:
+            state['fieldnames'] = self.writer.fieldnames
+        elif self.resume_state:
+            state['fieldnames'] = self.resume_state['fieldnames']
+        return state
+
+    def write_batch(self, rows):
+        fieldnames = self.writer.fieldnames
+        extra = [name for name in column_names(rows) if name not in fieldnames]
+        if extra:
+            self.widen(fieldnames + extra)
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def widen(self, fieldnames):
+        """Rewrite the part file under a header with more columns"""
+        print(f"Columns {fieldnames[len(self.writer.fieldnames):]} appeared after the CSV header was written; "
+              f"rewriting {self.part_path} with them")
+        self.close_file()
+        self.rewrite(fieldnames)
+        self.reopen({'fieldnames': fieldnames})
+
+    def rewrite(self, fieldnames, limit=None):
+        """Replace the part file with its first limit rows (all by default) under fieldnames"""
+        with atomic_path(self.part_path) as temp_path:
+            with open(self.part_path, newline='', encoding='utf-8') as old, \
+                    open(temp_path, 'w', newline='', encoding='utf-8') as new:
+                writer = csv.DictWriter(new, fieldnames=fieldnames, lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(itertools.islice(csv.DictReader(old), limit))
+
+
+class JsonLinesSink(RowSink):
+    """One JSON object per line"""
+
+    def open(self):
+        self.file = open(self.part_path, 'w', encoding='utf-8')
+
+    def reopen(self, state):
+        self.file = open(self.part_path, 'a', encoding='utf-8')
+
+    def write_batch(self, rows):
+        self.file.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+        self.file.flush()
+
+
+class ParquetSink(RowSink):
+    """Parquet output with one row group per flushed batch (needs pyarrow)
+
+    With a schema, derived columns such as Price_Amount are computed and
+    values are converted to its column types (unparseable numbers and dates
+    become nulls); without one, it is inferred from the first batch. The
+    file footer is only written on close, so a Parquet part file cannot
+    be appended to and crawls writing Parquet are not checkpointed.
+    """
+
+    resumable = False
+
+    def __init__(self, path, batch_size=BATCH_SIZE, resume=None, schema=None):
+        self.schema = schema
+        self.typed = schema is not None
+        super().__init__(path, batch_size, resume)
+
+    def open(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        if self.schema is None:
+            self.schema = pa.Table.from_pylist(self.buffer).schema
+        if os.path.dirname(self.part_path):
+            os.makedirs(os.path.dirname(self.part_path), exist_ok=True)
+        self.file = pq.ParquetWriter(self.part_path, self.schema, compression=PARQUET_COMPRESSION)
+        self.warned = False
+
+    def write_batch(self, rows):
+        if not self.warned:
+            extra = {key for row in rows for key in row} - set(self.schema.names)
+            if extra:
+                print(f"Warning: columns {sorted(extra)} are not in the Parquet schema; dropping them")
+                self.warned = True
+        columns = {field.name: [row.get(field.name) for row in rows] for field in self.schema}
+        if self.typed:
+            derive_columns(columns)
+            columns = {field.name: coerce_column(columns[field.name], field.type) for field in self.schema}
+        self.file.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonLinesSink, 'parquet': ParquetSink}
+
+
+def source_name(path):
+    """Name of the source an output path belongs to, e.g. 'boarding_houses'"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def dataset_path(path, date=None):
+    """Partition file for path's source and the scrape date under DATASET_ROOT"""
+    date = date or datetime.date.today().isoformat()
+    return os.path.join(DATASET_ROOT, f"source={source_name(path)}", f"date={date}", 'data.parquet')
+
+
+def output_path(path, format=None):
+    """Swap path's extension for the requested format
+
+    The 'dataset' format maps path to today's partition of its source, so
+    each day's snapshot is kept and a rerun only replaces that day.
+    """
+    if format is None:
+        return path
+    if format == 'dataset':
+        return dataset_path(path)
+    return os.path.splitext(path)[0] + '.' + format
+
+
+def open_sink(path, format=None, batch_size=BATCH_SIZE, resume=None, **kwargs):
+    """Open a sink for path, picking the format from its extension unless given"""
+    if format == 'dataset':
+        kwargs.setdefault('schema', schema_for(source_name(path)))
+    path = output_path(path, format)
+    format = os.path.splitext(path)[1].lstrip('.').lower()
+    if format not in SINKS:
+        raise ValueError(f"Unsupported output format {format!r}; expected one of {', '.join(FORMATS)}")
+    return SINKS[format](path, batch_size, resume, **kwargs)
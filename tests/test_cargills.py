@@ -0,0 +1,167 @@
+"""Cargills listing fast path against a local stand-in for the product endpoint"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cargills
+from http_client import HttpClient
+
+CATEGORY_URL = "https://cargillsonline.com/Product/Fruits?IC=Nw==&NC=Fruits"  # IC is base64 for 7
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves server.total products of category 7 in the requested pages"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        if body['CategoryId'] != '7':
+            self.send_error(404)
+            return
+        start = (body['PageIndex'] - 1) * body['PageSize']
+        products = [self.server.product(i) for i in range(start, min(self.server.total, start + body['PageSize']))]
+        payload = json.dumps(self.server.wrap(products)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    server.total = 100
+    server.requests = []
+    server.product = lambda i: {'ItemName': f"Item {i}", 'Price': 1250.0 + i, 'ItemImage': f"/img/{i}.jpg"}
+    server.wrap = lambda products: {'Data': {'Products': products}}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/Web/GetMenuCategoryItemsPagingV3/"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http(monkeypatch):
+    client = HttpClient(host_limits={'127.0.0.1': {'rate': 100.0, 'burst': 100, 'max_concurrency': 4}}, adaptive=False)
+    monkeypatch.setattr(cargills, 'default_client', lambda: client)
+    yield client
+    client.close()
+
+
+def scrape(stand_in, http, **kwargs):
+    pages = []
+    finished = cargills.scrape_category_http(CATEGORY_URL, lambda page, rows: pages.append((page, rows)), http,
+                                             stand_in.url, **kwargs)
+    return finished, pages
+
+
+def test_pages_until_short_last_page(stand_in, http):
+    finished, pages = scrape(stand_in, http, page_size=48)
+
+    assert finished
+    assert [page for page, _ in pages] == [1, 2, 3]
+    assert [len(rows) for _, rows in pages] == [48, 48, 4]
+    assert [body['PageIndex'] for body in stand_in.requests] == [1, 2, 3]
+    assert pages[0][1][0] == {'Category': 'Fruits', 'Name': "Item 0", 'Price': "Rs 1,250.00", 'Image_URL': "/img/0.jpg"}
+    assert pages[2][1][-1]['Name'] == "Item 99"
+
+
+def test_full_last_page_ends_on_empty_page(stand_in, http):
+    stand_in.total = 96
+    finished, pages = scrape(stand_in, http, page_size=48)
+
+    assert finished
+    assert [len(rows) for _, rows in pages] == [48, 48]
+    assert [body['PageIndex'] for body in stand_in.requests] == [1, 2, 3]
+
+
+def test_resume_starts_at_later_page(stand_in, http):
+    finished, pages = scrape(stand_in, http, page_size=48, start_page=3)
+
+    assert finished
+    assert [page for page, _ in pages] == [3]
+
+
+def test_unknown_payload_is_not_finished(stand_in, http):
+    stand_in.wrap = lambda products: {'Result': {'Rows': products}}
+    finished, pages = scrape(stand_in, http)
+
+    assert not finished
+    assert pages == []
+
+
+def test_unknown_product_fields_raise(stand_in, http):
+    stand_in.product = lambda i: {'Title': f"Item {i}", 'Cost': i}
+    with pytest.raises(ValueError):
+        scrape(stand_in, http)
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    """Replace Chrome with a fake whose scraper reports one page per category"""
+    calls = []
+
+    class FakeDriver:
+        def quit(self):
+            pass
+
+    def scrape_category_browser(driver, base_url, on_page, start_page=1):
+        calls.append(base_url)
+        on_page(1, [{'Category': cargills.category_name(base_url), 'Name': "From Chrome"}])
+        return True
+
+    monkeypatch.setattr(cargills, 'new_browser', lambda args=(): FakeDriver())
+    monkeypatch.setattr(cargills, 'scrape_category_browser', scrape_category_browser)
+    return calls
+
+
+def scrape_all(stand_in, mode='auto'):
+    pages = []
+    complete = cargills.scrape_categories([CATEGORY_URL], lambda key, page, rows: pages.append((key, page, rows)),
+                                          mode, stand_in.url)
+    return complete, pages
+
+
+def test_http_path_skips_browser(stand_in, http, browser):
+    complete, pages = scrape_all(stand_in)
+
+    assert complete
+    assert browser == []
+    assert sum(len(rows) for _, _, rows in pages) == 100
+
+
+@pytest.mark.parametrize('wrap', [
+    lambda products: {'Result': products},  # Unknown payload shape
+    lambda products: {'Data': []},  # No products at all
+])
+def test_empty_listing_falls_back_to_browser(stand_in, http, browser, wrap):
+    stand_in.wrap = wrap
+    complete, pages = scrape_all(stand_in)
+
+    assert complete
+    assert browser == [CATEGORY_URL]
+    assert pages == [(CATEGORY_URL + '#browser', 1, [{'Category': 'Fruits', 'Name': "From Chrome"}])]
+
+
+def test_failed_listing_falls_back_to_browser(stand_in, http, browser):
+    bad_url = CATEGORY_URL.replace('Nw==', 'OA==')  # Category 8, which the stand-in rejects
+    complete = cargills.scrape_categories([bad_url], lambda key, page, rows: None, 'auto', stand_in.url)
+
+    assert complete
+    assert browser == [bad_url]
+
+
+def test_http_mode_takes_empty_listing_at_its_word(stand_in, http, browser):
+    stand_in.wrap = lambda products: {'Data': []}
+    complete, pages = scrape_all(stand_in, mode='http')
+
+    assert complete
+    assert browser == []
+    assert pages == []
@@ -0,0 +1,79 @@
+import functools
+import re
+
+NUMBER = r'\d+\.\d+|\d+'
+DECIMAL = r'\d+\.\d+'
+
+
+def trie_pattern(words):
+    """Build a regex alternation for words, factored into a prefix trie
+
+    re tries alternatives one by one at each position, so a flat
+    "a|b|c|..." costs O(labels) per character. Sharing prefixes lets the
+    engine branch on one character at a time instead. Longer words are
+    preferred, falling back to shorter ones when they are a prefix.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if '' in node else group
+
+    return build(trie)
+
+
+class LabelMatcher:
+    """Find the number trailing each of many labels in a single regex scan
+
+    All labels are compiled into one trie-shaped alternation wrapped in a
+    lookahead, so finditer tries every text position once and overlapping
+    labels (such as "Repo Rate" inside "Reverse Repo Rate") are still
+    reported separately. Matching is case-insensitive.
+    """
+
+    def __init__(self, labels, number=NUMBER, suffix=''):
+        self.labels = tuple(labels)
+        self.suffix = suffix
+        self._lookup = {label.lower(): label for label in self.labels}
+
+        # Labels and text are lower-cased up front; re.IGNORECASE is much slower here
+        tail = f'({re.escape(suffix.lower())})?' if suffix else ''
+        self.pattern = re.compile(rf'(?=({trie_pattern(self._lookup)})[:\s]*({number}){tail})')
+
+    def scan(self, text):
+        """Return {label: first trailing number} for every label found in text"""
+        return self.scan_all(text)[0]
+
+    def scan_all(self, text):
+        """Return the first trailing number per label, and the first one followed by the suffix"""
+        first = {}
+        suffixed = {}
+        wanted = len(self._lookup)
+
+        for match in self.pattern.finditer(text.lower()):
+            label = self._lookup[match.group(1)]
+            first.setdefault(label, match.group(2))
+            if self.suffix and match.group(3):
+                suffixed.setdefault(label, match.group(2))
+
+            # Stop early once every label has all the answers it can get
+            if len(first) == wanted and (not self.suffix or len(suffixed) == wanted):
+                break
+
+        return first, suffixed
+
+
+@functools.lru_cache(maxsize=128)
+def get_matcher(labels, number=NUMBER, suffix=''):
+    """Return a compiled matcher, reusing it across pages and calls"""
+    return LabelMatcher(labels, number, suffix)
@@ -0,0 +1,189 @@
+"""Adaptive per-host request rates: additive increase, multiplicative decrease
+
+Every host gets one Throttle, shared by the HTTP client and the browser
+sessions. Each healthy response adds a small step to the host's rate, up
+to its max_rate; a response slower than LATENCY_FACTOR times the usual
+p95 adds nothing. A 429 or 503 response, a timeout, or a p95 latency well
+above the host's usual p95 cuts the rate by DECREASE, down to its
+min_rate; after a cut the throttle holds off on further cuts for
+COOLDOWN seconds so one burst of slow responses is not punished twice.
+The learned rate and latency baselines are saved per host in
+STATE_PATH when the process exits and are the starting point of the next
+run.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+from atomic import write_atomic
+
+STATE_PATH = os.path.join(
+    os.environ.get('SCRAPER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'scrapers')), 'throttle.json')
+INCREASE = 0.05  # Rate added per healthy response, as a fraction of the host's configured rate
+DECREASE = 0.5  # Rate multiplier on overload
+MAX_RATE_FACTOR = 4  # Default max_rate is the configured rate times this
+MIN_RATE_FACTOR = 0.1  # Default min_rate is the configured rate times this
+LATENCY_WINDOW = 40  # Recent responses the p95 is taken over
+MIN_SAMPLES = 10  # Responses needed before latency can trigger a backoff
+LATENCY_FACTOR = 2.0  # p95 this many times the baseline counts as overload
+COOLDOWN = 2.0  # Seconds after a backoff before the next one
+OVERLOAD_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces calls to a steady rate"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = float(rate)
+
+    def acquire(self):
+        """Block until a token is available and return the time spent waiting"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def p95(latencies):
+    ordered = sorted(latencies)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class Throttle:
+    """AIMD controller around a token bucket for one host
+
+    Latency is tracked separately per kind of request ('http', 'browser'),
+    since a rendered page load and an API call have very different normal
+    latencies, but both feed the host's one shared rate.
+    """
+
+    def __init__(self, host, limits, state=None, adaptive=True):
+        self.host = host
+        self.adaptive = adaptive
+        configured = float(limits['rate'])
+        self.min_rate = float(limits.get('min_rate', configured * MIN_RATE_FACTOR))
+        self.max_rate = float(limits.get('max_rate', configured * MAX_RATE_FACTOR))
+        self.step = configured * INCREASE
+        state = state or {}
+        rate = state.get('rate', configured) if adaptive else configured
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.baselines = dict(state.get('baselines', {}))
+        self.windows = {}
+        self.cooldown_until = 0.0
+        self.lock = threading.Lock()
+        self.bucket = TokenBucket(self.rate, limits['burst'])
+
+    def acquire(self):
+        """Wait for the host's next request slot and return the time spent waiting"""
+        return self.bucket.acquire()
+
+    def record(self, latency=None, kind='http', status=None, timed_out=False):
+        """Feed one finished request into the controller"""
+        if not self.adaptive:
+            return
+        with self.lock:
+            reason = None
+            baseline = self.baselines.get(kind)
+            # A single slow response does not back off on its own, but it does not earn more rate either
+            slow = latency is not None and baseline is not None and latency > LATENCY_FACTOR * baseline
+            if timed_out:
+                reason = "timeout"
+            elif status in OVERLOAD_STATUSES:
+                reason = f"HTTP {status}"
+            elif latency is not None:
+                reason = self.latency_check(kind, latency)
+
+            if reason is None:
+                if not slow:
+                    self.rate = min(self.max_rate, self.rate + self.step)
+            elif time.monotonic() >= self.cooldown_until:
+                self.rate = max(self.min_rate, self.rate * DECREASE)
+                self.cooldown_until = time.monotonic() + COOLDOWN
+                # Latencies seen at the old rate say nothing about the new one
+                self.windows.clear()
+                metrics.count('throttle_backoffs')
+                print(f"Slowing {self.host} to {self.rate:.2f} req/s ({reason})")
+            self.bucket.set_rate(self.rate)
+
+    def latency_check(self, kind, latency):
+        """Return why latency counts as overload, or None; keeps the baseline current"""
+        window = self.windows.setdefault(kind, deque(maxlen=LATENCY_WINDOW))
+        window.append(latency)
+        if len(window) < MIN_SAMPLES:
+            return None
+        current = p95(window)
+        baseline = self.baselines.get(kind)
+        if baseline is None:
+            self.baselines[kind] = current
+            return None
+        if current > LATENCY_FACTOR * baseline:
+            return f"p95 {current:.2f}s against a usual {baseline:.2f}s"
+        # Follow improvements quickly and degradations slowly, so a gradual slowdown still trips the check
+        self.baselines[kind] = baseline + (0.2 if current < baseline else 0.01) * (current - baseline)
+        return None
+
+    def state(self):
+        with self.lock:
+            return {'rate': round(self.rate, 3), 'baselines': {kind: round(value, 4)
+                                                               for kind, value in self.baselines.items()},
+                    'updated': time.time()}
+
+
+class ThrottleRegistry:
+    """The process's throttles, keyed by host, loaded from and saved to STATE_PATH"""
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self.throttles = {}
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.saved = json.load(f)
+        except (OSError, ValueError):
+            self.saved = {}
+
+    def get(self, host, limits, adaptive=True):
+        with self.lock:
+            if host not in self.throttles:
+                self.throttles[host] = Throttle(host, limits, self.saved.get(host), adaptive)
+            return self.throttles[host]
+
+    def save(self):
+        """Write back the hosts this process used, keeping the others' saved state"""
+        with self.lock:
+            throttles = [throttle for throttle in self.throttles.values() if throttle.adaptive]
+        if not throttles:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        for throttle in throttles:
+            state[throttle.host] = throttle.state()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_atomic(self.path, json.dumps(state, indent=1, sort_keys=True))
+
+
+registry = ThrottleRegistry()
+atexit.register(registry.save)
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import metrics
+
+POLL_INTERVAL = 0.1
+
+# label -> [waits, seconds actually waited, seconds budgeted]
+wait_stats = {}
+_stats_lock = threading.Lock()
+
+
+def wait_for(driver, condition, timeout, label, poll=POLL_INTERVAL):
+    """Wait until condition(driver) is truthy or the timeout expires
+
+    Returns the condition's value, or None on timeout. Every wait is logged
+    with the time it actually took against its budget, and added to
+    wait_stats so a run can report where its waiting went.
+    """
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=poll,
+                               ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+    except TimeoutException:
+        result = None
+    elapsed = time.monotonic() - start
+    metrics.observe('wait', elapsed)
+
+    with _stats_lock:
+        stats = wait_stats.setdefault(label, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += timeout
+    status = "ready" if result else "timed out"
+    print(f"Waited {elapsed:.2f}s of {timeout:g}s for {label} ({status})")
+    return result
+
+
+def print_wait_summary(scraper=None):
+    """Print actual vs budgeted wait time per wait label
+
+    Jobs of a combined run (metrics.combine_reports) leave the summary to
+    the run, which passes its own name.
+    """
+    if not wait_stats or not metrics.reports_to(scraper):
+        return
+    print("Wait summary (actual / budget):")
+    for label, (count, actual, budget) in wait_stats.items():
+        print(f"  {label}: {count} waits, {actual:.1f}s / {budget:.1f}s")
+
+
+def any_of(*conditions):
+    """Condition met as soon as any of the given conditions is"""
+    def condition(driver):
+        for check in conditions:
+            result = check(driver)
+            if result:
+                return result
+        return False
+    return condition
+
+
+def elements_present(locator):
+    """Condition returning the matching elements once there is at least one"""
+    def condition(driver):
+        return driver.find_elements(*locator) or False
+    return condition
+
+
+FINGERPRINT_JS = """
+var nodes = document.querySelectorAll(arguments[0]);
+var parts = [];
+for (var i = 0; i < nodes.length; i++) { parts.push(nodes[i].textContent); }
+return parts.join('\\u0001');
+"""
+
+
+def content_fingerprint(driver, css_selector):
+    """Hash the text of every element matching css_selector in one script call"""
+    text = driver.execute_script(FINGERPRINT_JS, css_selector) or ''
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def fingerprint_changed(css_selector, old_fingerprint):
+    """Condition met once the content under css_selector is non-empty and differs from before"""
+    def condition(driver):
+        fingerprint = content_fingerprint(driver, css_selector)
+        empty = hashlib.sha1(b'').hexdigest()
+        return fingerprint if fingerprint not in (old_fingerprint, empty) else False
+    return condition
+
+
+NETWORK_STATE_JS = """
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+
+def network_idle(idle_time=0.5):
+    """Condition met once the page has loaded and fetched no new resources for idle_time
+
+    Resource timing entries appear as requests complete, so an unchanged
+    count over idle_time means XHR/fetch traffic and lazy loads have settled.
+    """
+    state = {'count': None, 'since': None}
+
+    def condition(driver):
+        ready, count = driver.execute_script(NETWORK_STATE_JS)
+        now = time.monotonic()
+        if ready != 'complete' or count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return now - state['since'] >= idle_time
+    return condition